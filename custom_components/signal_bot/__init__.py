@@ -1,25 +1,72 @@
 """Integration to connect Signal messaging with Home Assistant."""
 
 import asyncio
-import logging
+from functools import partial
+import json
+import re
+import time
 from typing import Any
 
 import aiohttp
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
 import voluptuous as vol
 
+from . import websocket_api
+from .attachments import (
+    AttachmentFetcher,
+    async_check_attachments,
+    async_encode_attachments,
+)
 from .const import (
     API_ENDPOINT_SEND,
     ATTR_GROUP_ID,
+    BROADCAST_BATCH_SIZE,
+    BROADCAST_CONCURRENCY,
     CONF_API_URL,
+    CONF_ATTACHMENT_MAX_AGE,
+    CONF_ATTACHMENT_QUOTA,
+    CONF_COMMANDS,
     CONF_PHONE_NUMBER,
-    DEBUG_DETAILED,
+    CONF_RAW_MAX_BYTES,
+    CONF_RAW_RETENTION,
+    CONF_SCHEDULE_DIGEST,
+    CONF_SUPPRESSION,
+    CONF_SUPPRESSION_WINDOW,
+    CONF_THUMBNAILS,
+    DATA_ATTACHMENT_FETCHER,
+    DATA_COMMAND_ROUTER,
+    DATA_DELIVERY,
+    DATA_HISTORY,
+    DATA_JANITOR,
+    DATA_OUTBOUND,
+    DATA_RAW_ENVELOPES,
+    DATA_SCHEDULER,
+    DATA_SUPPRESSION,
+    DATA_THUMBNAIL_POOL,
+    DEBUG_SUBSYSTEM_SEND,
+    DEBUG_SUBSYSTEM_SETUP,
+    DEBUG_SUBSYSTEMS,
     DEFAULT_API_URL,
+    DEFAULT_ATTACHMENT_MAX_AGE,
+    DEFAULT_ATTACHMENT_QUOTA,
     DEFAULT_PHONE_NUMBER,
+    DEFAULT_RAW_MAX_BYTES,
+    DEFAULT_RAW_RETENTION,
+    DEFAULT_SCHEDULE_DIGEST,
+    DEFAULT_SUPPRESSION,
+    DEFAULT_SUPPRESSION_WINDOW,
+    DEFAULT_THUMBNAILS,
     DEFAULT_TIMEOUT,
     DOMAIN,
     HTTP_CREATED,
@@ -28,9 +75,26 @@ from .const import (
     LOG_PREFIX_SETUP,
     MESSAGE_TYPE_GROUP,
     MESSAGE_TYPE_INDIVIDUAL,
+    PRIORITIES,
+    PRIORITY_CRITICAL,
+    PRIORITY_NORMAL,
+    SCHEDULE_STORAGE_KEY,
+    SCHEDULE_STORAGE_VERSION,
+    STORAGE_KEY,
+    STORAGE_VERSION,
 )
+from .debug import SETTINGS, Payload, get_logger, is_detailed
+from .janitor import AttachmentJanitor
+from .outbound import OutboundDispatcher
+from .raw_envelopes import RawEnvelopeRetention
+from .receipts import DeliveryTracker
+from .router import COMMAND_SCHEMA, CommandRouter
+from .scheduler import SendScheduler, pop_due_time
+from .suppression import OutboundSuppressor
+from .thumbnails import create_thumbnail_pool
 
-_LOGGER = logging.getLogger(__name__)
+_LOGGER = get_logger(__name__, LOG_PREFIX_SETUP)
+_SEND_LOGGER = get_logger(__name__, LOG_PREFIX_SEND)
 
 PLATFORMS = [Platform.SENSOR]
 
@@ -42,6 +106,36 @@ SEND_MESSAGE_SCHEMA = vol.Schema(
         vol.Optional("is_group", default=False): cv.boolean,
         vol.Optional("attachments"): vol.All(cv.ensure_list, [cv.string]),
         vol.Optional("base64_attachments"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("attachment_urls"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("priority", default=PRIORITY_NORMAL): vol.In(PRIORITIES),
+        vol.Exclusive("send_at", "schedule"): cv.datetime,
+        vol.Exclusive("send_after", "schedule"): cv.time_period,
+    }
+)
+
+BROADCAST_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional("recipients"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional("groups"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Required("message"): cv.string,
+            vol.Optional("attachments"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional("base64_attachments"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional("attachment_urls"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional("priority", default=PRIORITY_NORMAL): vol.In(PRIORITIES),
+        }
+    ),
+    cv.has_at_least_one_key("recipients", "groups"),
+)
+
+SET_DEBUG_SCHEMA = vol.Schema(
+    {
+        vol.Optional("subsystems", default=DEBUG_SUBSYSTEMS): vol.All(
+            cv.ensure_list, [vol.In(DEBUG_SUBSYSTEMS)]
+        ),
+        vol.Required("enabled"): cv.boolean,
+        vol.Optional("sample_rate"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional("max_payload"): vol.All(vol.Coerce(int), vol.Range(min=100)),
     }
 )
 
@@ -53,6 +147,9 @@ CONFIG_SCHEMA = vol.Schema(
                 vol.Optional(
                     CONF_PHONE_NUMBER, default=DEFAULT_PHONE_NUMBER
                 ): cv.string,
+                vol.Optional(CONF_COMMANDS, default=[]): vol.All(
+                    cv.ensure_list, [COMMAND_SCHEMA]
+                ),
             }
         )
     },
@@ -62,15 +159,47 @@ CONFIG_SCHEMA = vol.Schema(
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up Signal Bot integration."""
-    _LOGGER.debug(f"{LOG_PREFIX_SETUP} Signal Bot integration setup initialized.")
+    _LOGGER.debug("Signal Bot integration setup initialized.")
     hass.data.setdefault(DOMAIN, {})
+    websocket_api.async_setup(hass)
+
+    if commands := config.get(DOMAIN, {}).get(CONF_COMMANDS):
+        try:
+            hass.data[DOMAIN][DATA_COMMAND_ROUTER] = CommandRouter(hass, commands)
+        except re.error:
+            _LOGGER.exception("Inbound commands disabled, invalid regex")
+        else:
+            _LOGGER.info("Loaded %s inbound commands.", len(commands))
+
+    async def handle_set_debug(call: ServiceCall) -> ServiceResponse:
+        """Switch detailed logging per subsystem without a restart."""
+        SETTINGS.configure(
+            call.data["subsystems"],
+            call.data["enabled"],
+            call.data.get("sample_rate"),
+            call.data.get("max_payload"),
+        )
+        _LOGGER.info("Detailed logging: %s", SETTINGS.as_dict())
+        return SETTINGS.as_dict()
+
+    hass.services.async_register(
+        DOMAIN,
+        "set_debug",
+        handle_set_debug,
+        schema=SET_DEBUG_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
     return True
 
 
 def prepare_payload(
-    message: str, phone_number: str, recipient: str, is_group: bool
+    message: str, phone_number: str, recipient: str | list[str], is_group: bool
 ) -> dict[str, Any]:
-    """Prepare the message payload."""
+    """Prepare the message payload.
+
+    For individual messages the recipient may also be a list of phone numbers,
+    which are sent in a single request.
+    """
     if is_group:
         return {
             "message": message,
@@ -80,137 +209,520 @@ def prepare_payload(
     return {
         "message": message,
         "number": phone_number,
-        "recipients": [recipient],
+        "recipients": recipient if isinstance(recipient, list) else [recipient],
     }
 
 
-def handle_attachments(payload: dict[str, Any], call_data: dict[str, Any]) -> None:
-    """Handle attachment data in the payload."""
-    for attachment_type in ["attachments", "base64_attachments"]:
-        attachments = call_data.get(attachment_type)
-        if attachments:
-            if isinstance(attachments, list):
-                payload[attachment_type] = attachments
-            else:
-                _LOGGER.warning(
-                    f"{LOG_PREFIX_SEND} '{attachment_type}' must be a list. Ignoring."
-                )
+def handle_attachments(
+    payload: dict[str, Any], call_data: dict[str, Any], encoded: list[str]
+) -> None:
+    """Handle attachment data in the payload.
+
+    Local files from 'attachments' have already been encoded and are sent
+    together with any 'base64_attachments' given by the caller.
+    """
+    attachments = call_data.get("base64_attachments") or []
+    if not isinstance(attachments, list):
+        _SEND_LOGGER.warning("'base64_attachments' must be a list. Ignoring.")
+        attachments = []
+    if attachments or encoded:
+        payload["base64_attachments"] = [*attachments, *encoded]
 
 
 async def send_signal_message(
-    url: str, payload: dict[str, Any], message_type: str, recipient: str
-) -> None:
-    """Send message to Signal API."""
+    session: aiohttp.ClientSession,
+    url: str,
+    payload: dict[str, Any],
+    message_type: str,
+    recipient: str,
+) -> dict[str, Any]:
+    """Send message to Signal API.
+
+    Returns:
+        Result with 'success', HTTP 'status', the Signal 'timestamp' of the sent
+        message, an 'error' description and the request 'duration_ms'.
+
+    """
+    result: dict[str, Any] = {
+        "success": False,
+        "status": None,
+        "timestamp": None,
+        "error": None,
+    }
+    started = time.monotonic()
     try:
-        async with (
-            aiohttp.ClientSession() as session,
-            session.post(url, json=payload, timeout=DEFAULT_TIMEOUT) as response,
-        ):
+        async with session.post(url, json=payload, timeout=DEFAULT_TIMEOUT) as response:
+            response_text = await response.text()
+            result["status"] = response.status
             if response.status in (HTTP_OK, HTTP_CREATED):  # Accept both 200 and 201
-                _LOGGER.info(
-                    f"{LOG_PREFIX_SEND} %s message sent successfully to %s",
+                result["success"] = True
+                result["timestamp"] = parse_send_timestamp(response_text)
+                _SEND_LOGGER.info(
+                    "%s message sent successfully to %s",
                     message_type,
                     recipient,
                 )
-                if DEBUG_DETAILED:
-                    response_text = await response.text()
-                    _LOGGER.debug(
-                        f"{LOG_PREFIX_SEND} Server response (HTTP %s): %s",
+                if is_detailed(DEBUG_SUBSYSTEM_SEND):
+                    _SEND_LOGGER.debug(
+                        "Server response (HTTP %s): %s",
                         response.status,
-                        response_text,
+                        Payload(response_text),
                     )
             else:
-                error_text = await response.text()
-                _LOGGER.error(
-                    f"{LOG_PREFIX_SEND} Failed to send %s message to %s: %s "
-                    f"(HTTP %s)",
+                result["error"] = response_text
+                _SEND_LOGGER.error(
+                    "Failed to send %s message to %s: %s (HTTP %s)",
                     message_type,
                     recipient,
-                    error_text,
+                    response_text,
                     response.status,
                 )
     except TimeoutError:
-        _LOGGER.exception(
-            f"{LOG_PREFIX_SEND} Timeout occurred while sending %s message to %s",
+        result["error"] = "timeout"
+        _SEND_LOGGER.exception(
+            "Timeout occurred while sending %s message to %s",
             message_type,
             recipient,
         )
-    except aiohttp.ClientConnectionError:
-        _LOGGER.exception(
-            f"{LOG_PREFIX_SEND} Connection error to Signal Bot API (%s)",
+    except aiohttp.ClientConnectionError as err:
+        result["error"] = f"connection error: {err}"
+        _SEND_LOGGER.exception(
+            "Connection error to Signal Bot API (%s)",
             url,
         )
-    except Exception:
-        _LOGGER.exception(
-            f"{LOG_PREFIX_SEND} Unexpected error while sending %s message",
+    except Exception as err:
+        result["error"] = f"unexpected error: {err}"
+        _SEND_LOGGER.exception(
+            "Unexpected error while sending %s message",
             message_type,
         )
 
+    result["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return result
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up Signal Bot from a config entry."""
-    _LOGGER.info(f"{LOG_PREFIX_SETUP} Setting up Signal Bot integration entry.")
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = entry.data
 
-    async def handle_send_message(call: ServiceCall) -> None:
-        """Handle sending a Signal message."""
-        api_url = entry.data.get(CONF_API_URL, DEFAULT_API_URL)
-        phone_number = entry.data.get(CONF_PHONE_NUMBER, DEFAULT_PHONE_NUMBER)
+def parse_send_timestamp(response_text: str) -> int | None:
+    """Extract the Signal timestamp from a send response body."""
+    try:
+        return int(json.loads(response_text)["timestamp"])
+    except (ValueError, TypeError, KeyError):
+        return None
 
-        try:
-            validated_data = SEND_MESSAGE_SCHEMA(dict(call.data))
-        except vol.Invalid:
-            _LOGGER.exception(f"{LOG_PREFIX_SEND} Invalid service call parameters")
-            return
 
-        recipient = validated_data["recipient"]
-        message = validated_data["message"]
-        is_group = validated_data["is_group"]
+async def broadcast_signal_message(
+    dispatcher: OutboundDispatcher,
+    priority: str,
+    session: aiohttp.ClientSession,
+    url: str,
+    *,
+    phone_number: str,
+    message: str,
+    recipients: list[str],
+    groups: list[str],
+    attachments: list[str],
+) -> dict[str, Any]:
+    """Send one message to many recipients and groups.
 
-        # Prepare API URL and payload
-        url = f"{api_url.rstrip('/')}{API_ENDPOINT_SEND}"
-        payload = prepare_payload(message, phone_number, recipient, is_group)
+    Individual recipients are batched into multi-recipient requests and all
+    requests run concurrently, bounded by BROADCAST_CONCURRENCY and by the
+    outbound lane for the priority.
+
+    Returns:
+        Overall counts and duration plus a per-recipient result keyed by
+        phone number or group ID.
+
+    """
+    semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+    unique_recipients = list(dict.fromkeys(recipients))
+    requests: list[tuple[list[str], bool]] = [
+        (unique_recipients[i : i + BROADCAST_BATCH_SIZE], False)
+        for i in range(0, len(unique_recipients), BROADCAST_BATCH_SIZE)
+    ]
+    requests.extend(([group], True) for group in dict.fromkeys(groups))
+
+    async def send_request(targets: list[str], is_group: bool) -> dict[str, Any]:
+        payload = prepare_payload(
+            message, phone_number, targets[0] if is_group else targets, is_group
+        )
+        if attachments:
+            payload["base64_attachments"] = attachments
         message_type = MESSAGE_TYPE_GROUP if is_group else MESSAGE_TYPE_INDIVIDUAL
+        async with semaphore:
+            return await dispatcher.async_send(
+                priority,
+                lambda: send_signal_message(
+                    session, url, payload, message_type, ", ".join(targets)
+                ),
+            )
+
+    started = time.monotonic()
+    outcomes = await asyncio.gather(
+        *(send_request(targets, is_group) for targets, is_group in requests)
+    )
+
+    results: dict[str, dict[str, Any]] = {}
+    for (targets, _), outcome in zip(requests, outcomes, strict=True):
+        for target in targets:
+            results[target] = {**outcome, "batch_size": len(targets)}
+
+    sent = sum(1 for result in results.values() if result["success"])
+    return {
+        "sent": sent,
+        "failed": len(results) - sent,
+        "requests": len(requests),
+        "duration_ms": round((time.monotonic() - started) * 1000, 1),
+        "results": results,
+    }
+
+
+async def async_send(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    runtime_data: dict[str, Any],
+    recipient: str,
+    is_group: bool,
+    payload: dict[str, Any],
+    priority: str,
+) -> dict[str, Any]:
+    """Send a prepared payload in its outbound lane and track its delivery."""
+    api_url = entry.data.get(CONF_API_URL, DEFAULT_API_URL)
+    url = f"{api_url.rstrip('/')}{API_ENDPOINT_SEND}"
+    message_type = MESSAGE_TYPE_GROUP if is_group else MESSAGE_TYPE_INDIVIDUAL
+
+    if is_detailed(DEBUG_SUBSYSTEM_SEND):
+        _SEND_LOGGER.debug(
+            "Sending %s message with payload: %s",
+            message_type,
+            Payload(payload),
+        )
+
+    session = async_get_clientsession(hass)
+    result = await runtime_data[DATA_OUTBOUND].async_send(
+        priority,
+        lambda: send_signal_message(session, url, payload, message_type, recipient),
+    )
+    if result["timestamp"]:
+        runtime_data[DATA_DELIVERY].track(
+            result["timestamp"], [recipient], priority, is_group
+        )
+    return result
+
+
+async def async_send_digest(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    runtime_data: dict[str, Any],
+    recipient: str,
+    is_group: bool,
+    message: str,
+    priority: str,
+) -> None:
+    """Send the digest of a suppressed message."""
+    phone_number = entry.data.get(CONF_PHONE_NUMBER, DEFAULT_PHONE_NUMBER)
+    payload = prepare_payload(message, phone_number, recipient, is_group)
+    await async_send(hass, entry, runtime_data, recipient, is_group, payload, priority)
+
+
+async def async_send_message(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    runtime_data: dict[str, Any],
+    validated_data: dict[str, Any],
+) -> ServiceResponse:
+    """Send a validated send_message request now."""
+    phone_number = entry.data.get(CONF_PHONE_NUMBER, DEFAULT_PHONE_NUMBER)
+    recipient = validated_data["recipient"]
+    message = validated_data["message"]
+    is_group = validated_data["is_group"]
+    priority = validated_data["priority"]
+    urls = validated_data.get("attachment_urls", [])
+    suppressor = runtime_data[DATA_SUPPRESSION]
+    attachment_keys = [*validated_data.get("attachments", []), *urls]
+
+    # Critical sends and inline attachments are never suppressed
+    suppressible = (
+        priority != PRIORITY_CRITICAL and "base64_attachments" not in validated_data
+    )
+    if suppressible and (
+        repeats := suppressor.check(
+            recipient, is_group, message, priority, attachment_keys
+        )
+    ):
+        return {"success": True, "suppressed": True, "repeats": repeats}
+
+    sent = False
+    try:
+        payload = prepare_payload(message, phone_number, recipient, is_group)
 
         # Handle attachments
-        handle_attachments(payload, validated_data)
+        try:
+            encoded = await async_encode_attachments(
+                hass, validated_data.get("attachments", [])
+            )
+            encoded += await runtime_data[DATA_ATTACHMENT_FETCHER].async_fetch(urls)
+        except ValueError as err:
+            _SEND_LOGGER.exception("Invalid attachment")
+            return {"success": False, "error": str(err)}
+        handle_attachments(payload, validated_data, encoded)
+
+        result = await async_send(
+            hass, entry, runtime_data, recipient, is_group, payload, priority
+        )
+        sent = result["success"]
+        return result
+    finally:
+        # Repeats of a message that never arrived must not be suppressed
+        if suppressible and not sent:
+            suppressor.discard(recipient, message, attachment_keys)
+
 
-        if DEBUG_DETAILED:
-            _LOGGER.debug(
-                f"{LOG_PREFIX_SEND} Sending {message_type} message with payload: %s",
-                payload,
+async def handle_send_message(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    runtime_data: dict[str, Any],
+    call: ServiceCall,
+) -> ServiceResponse:
+    """Handle sending a Signal message, now or at a later time."""
+    try:
+        validated_data = SEND_MESSAGE_SCHEMA(dict(call.data))
+    except vol.Invalid as err:
+        _SEND_LOGGER.exception("Invalid service call parameters")
+        return {"success": False, "error": str(err)}
+
+    if (due := pop_due_time(validated_data)) is not None:
+        # Reject a send that can never go out now rather than when it is due
+        try:
+            await async_check_attachments(
+                hass,
+                validated_data.get("attachments", []),
+                validated_data.get("attachment_urls", []),
             )
+        except ValueError as err:
+            _SEND_LOGGER.exception("Invalid attachment")
+            return {"success": False, "error": str(err)}
+        return runtime_data[DATA_SCHEDULER].schedule(validated_data, due)
+    return await async_send_message(hass, entry, runtime_data, validated_data)
+
+
+async def handle_broadcast(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    runtime_data: dict[str, Any],
+    call: ServiceCall,
+) -> ServiceResponse:
+    """Handle sending a Signal message to many recipients and groups."""
+    api_url = entry.data.get(CONF_API_URL, DEFAULT_API_URL)
+    phone_number = entry.data.get(CONF_PHONE_NUMBER, DEFAULT_PHONE_NUMBER)
+
+    # Fetched once and shared by every request of the broadcast
+    try:
+        encoded = await async_encode_attachments(hass, call.data.get("attachments", []))
+        encoded += await runtime_data[DATA_ATTACHMENT_FETCHER].async_fetch(
+            call.data.get("attachment_urls", [])
+        )
+    except ValueError as err:
+        _SEND_LOGGER.exception("Invalid attachment")
+        return {"success": False, "error": str(err)}
+    attachments = [*call.data.get("base64_attachments", []), *encoded]
+
+    response = await broadcast_signal_message(
+        runtime_data[DATA_OUTBOUND],
+        call.data["priority"],
+        async_get_clientsession(hass),
+        f"{api_url.rstrip('/')}{API_ENDPOINT_SEND}",
+        phone_number=phone_number,
+        message=call.data["message"],
+        recipients=call.data.get("recipients", []),
+        groups=call.data.get("groups", []),
+        attachments=attachments,
+    )
+    # Recipients batched into one request share the request's timestamp.
+    sent_groups = set(call.data.get("groups", []))
+    batches: dict[int, list[str]] = {}
+    for target, result in response["results"].items():
+        if not result["timestamp"]:
+            continue
+        if target in sent_groups:
+            runtime_data[DATA_DELIVERY].track(
+                result["timestamp"], [target], call.data["priority"], True
+            )
+        else:
+            batches.setdefault(result["timestamp"], []).append(target)
+    for timestamp, recipients in batches.items():
+        runtime_data[DATA_DELIVERY].track(timestamp, recipients, call.data["priority"])
+
+    _SEND_LOGGER.info(
+        "Broadcast finished: %s sent, %s failed in %s ms",
+        response["sent"],
+        response["failed"],
+        response["duration_ms"],
+    )
+    return response
+
+
+async def handle_get_raw_envelopes(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    runtime_data: dict[str, Any],
+    call: ServiceCall,
+) -> ServiceResponse:
+    """Return the raw envelopes kept by the retention policy."""
+    retention = runtime_data[DATA_RAW_ENVELOPES]
+    return {**retention.stats, "envelopes": retention.as_list()}
+
+
+async def handle_get_delivery_status(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    runtime_data: dict[str, Any],
+    call: ServiceCall,
+) -> ServiceResponse:
+    """Return the delivery status of a sent message."""
+    status = runtime_data[DATA_DELIVERY].status(call.data["timestamp"])
+    return status or {"timestamp": call.data["timestamp"], "tracked": False}
 
-        await send_signal_message(url, payload, message_type, recipient)
 
-    # Register the service to send messages
+def referenced_attachments(hass: HomeAssistant) -> set[str] | None:
+    """Return the attachments the message histories of all entries still use.
+
+    Every entry saves attachments to the same directory, so a file is unused
+    only if no enabled entry refers to it. Returns None while the history of
+    an enabled entry is not loaded.
+    """
+    referenced: set[str] = set()
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.disabled_by:
+            continue
+        history = hass.data[DOMAIN].get(entry.entry_id, {}).get(DATA_HISTORY)
+        if history is None or (paths := history.referenced_attachments()) is None:
+            return None
+        referenced |= paths
+    return referenced
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up Signal Bot from a config entry."""
+    _LOGGER.info("Setting up Signal Bot integration entry.")
+    hass.data.setdefault(DOMAIN, {})
+    runtime_data: dict[str, Any] = {
+        DATA_RAW_ENVELOPES: RawEnvelopeRetention(
+            entry.options.get(CONF_RAW_RETENTION, DEFAULT_RAW_RETENTION),
+            entry.options.get(CONF_RAW_MAX_BYTES, DEFAULT_RAW_MAX_BYTES),
+        ),
+        DATA_OUTBOUND: OutboundDispatcher(),
+        DATA_DELIVERY: DeliveryTracker(hass),
+        DATA_ATTACHMENT_FETCHER: AttachmentFetcher(hass),
+    }
+    hass.data[DOMAIN][entry.entry_id] = runtime_data
+
+    if entry.options.get(CONF_THUMBNAILS, DEFAULT_THUMBNAILS):
+        runtime_data[DATA_THUMBNAIL_POOL] = create_thumbnail_pool()
+
+    runtime_data[DATA_SUPPRESSION] = OutboundSuppressor(
+        hass,
+        entry.options.get(CONF_SUPPRESSION, DEFAULT_SUPPRESSION),
+        entry.options.get(CONF_SUPPRESSION_WINDOW, DEFAULT_SUPPRESSION_WINDOW),
+        partial(async_send_digest, hass, entry, runtime_data),
+    )
+
+    scheduler = SendScheduler(
+        hass,
+        entry.entry_id,
+        partial(async_send_message, hass, entry, runtime_data),
+        entry.options.get(CONF_SCHEDULE_DIGEST, DEFAULT_SCHEDULE_DIGEST),
+    )
+    await scheduler.async_load()
+    runtime_data[DATA_SCHEDULER] = scheduler
+
+    # Register the services to send messages
+    hass.services.async_register(
+        DOMAIN,
+        "send_message",
+        partial(handle_send_message, hass, entry, runtime_data),
+        schema=SEND_MESSAGE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
     hass.services.async_register(
-        DOMAIN, "send_message", handle_send_message, schema=SEND_MESSAGE_SCHEMA
+        DOMAIN,
+        "broadcast",
+        partial(handle_broadcast, hass, entry, runtime_data),
+        schema=BROADCAST_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "get_delivery_status",
+        partial(handle_get_delivery_status, hass, entry, runtime_data),
+        schema=vol.Schema({vol.Required("timestamp"): vol.Coerce(int)}),
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "get_raw_envelopes",
+        partial(handle_get_raw_envelopes, hass, entry, runtime_data),
+        supports_response=SupportsResponse.ONLY,
     )
 
     # Forward the setup to the sensor platform
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    scheduler.async_start()
+
+    janitor = AttachmentJanitor(
+        hass,
+        entry.options.get(CONF_ATTACHMENT_QUOTA, DEFAULT_ATTACHMENT_QUOTA),
+        entry.options.get(CONF_ATTACHMENT_MAX_AGE, DEFAULT_ATTACHMENT_MAX_AGE),
+        partial(referenced_attachments, hass),
+    )
+    if janitor.enabled:
+        runtime_data[DATA_JANITOR] = janitor
+        janitor.async_start()
 
-    if DEBUG_DETAILED:
-        _LOGGER.debug(f"{LOG_PREFIX_SETUP} Signal Bot setup completed.")
+    if is_detailed(DEBUG_SUBSYSTEM_SETUP):
+        _LOGGER.debug("Signal Bot setup completed.")
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    _LOGGER.info(f"{LOG_PREFIX_SETUP} Unloading Signal Bot integration entry.")
+    _LOGGER.info("Unloading Signal Bot integration entry.")
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
-        if DEBUG_DETAILED:
-            _LOGGER.debug(
-                f"{LOG_PREFIX_SETUP} Signal Bot integration entry unloaded successfully."
-            )
+        runtime_data = hass.data[DOMAIN].pop(entry.entry_id, {})
+        if tracker := runtime_data.get(DATA_DELIVERY):
+            tracker.async_shutdown()
+        if suppressor := runtime_data.get(DATA_SUPPRESSION):
+            suppressor.async_shutdown()
+        if janitor := runtime_data.get(DATA_JANITOR):
+            janitor.async_shutdown()
+        if scheduler := runtime_data.get(DATA_SCHEDULER):
+            await scheduler.async_shutdown()
+        if pool := runtime_data.get(DATA_THUMBNAIL_POOL):
+            pool.shutdown(wait=False, cancel_futures=True)
+        if is_detailed(DEBUG_SUBSYSTEM_SETUP):
+            _LOGGER.debug("Signal Bot integration entry unloaded successfully.")
     else:
-        _LOGGER.error(
-            f"{LOG_PREFIX_SETUP} Failed to unload Signal Bot integration entry."
-        )
+        _LOGGER.error("Failed to unload Signal Bot integration entry.")
 
     return unload_ok
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored message history and scheduled sends of the entry."""
+    store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry.entry_id))
+    await store.async_remove()
+    store = Store(
+        hass,
+        SCHEDULE_STORAGE_VERSION,
+        SCHEDULE_STORAGE_KEY.format(entry_id=entry.entry_id),
+    )
+    await store.async_remove()
+    if is_detailed(DEBUG_SUBSYSTEM_SETUP):
+        _LOGGER.debug("Removed stored message history and scheduled sends.")
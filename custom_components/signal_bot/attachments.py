@@ -0,0 +1,343 @@
+"""Encoding of local files and URLs into Signal base64 attachments."""
+
+import asyncio
+import base64
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+import mimetypes
+from pathlib import Path, PurePosixPath
+import threading
+import time
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.network import NoURLAvailableError, get_url
+
+from .const import (
+    ATTACHMENT_CACHE_MAX_BYTES,
+    ATTACHMENT_ENCODE_BLOCK,
+    ATTACHMENT_FETCH_CHUNK,
+    ATTACHMENT_FETCH_CONCURRENCY,
+    ATTACHMENT_FETCH_TIMEOUT,
+    ATTACHMENT_MAX_SIZE,
+    DEBUG_SUBSYSTEM_SEND,
+    HTTP_OK,
+    LOG_PREFIX_ATTACHMENTS,
+)
+from .debug import get_logger, is_detailed
+
+_LOGGER = get_logger(__name__, LOG_PREFIX_ATTACHMENTS)
+
+
+class AttachmentError(ValueError):
+    """Error to indicate an attachment cannot be sent."""
+
+    def __init__(self, name: str, reason: str) -> None:
+        """Initialize the error for the file or URL name."""
+        super().__init__(f"{name} {reason}")
+
+
+class EncodedAttachmentCache:
+    """LRU cache of data URIs keyed by (path, mtime, size).
+
+    Rewriting a file changes its mtime or size and therefore its key, so stale
+    entries are never returned; they simply age out of the cache.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """Initialize the cache."""
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple[str, int, int]) -> str | None:
+        """Return a cached data URI and mark it as recently used."""
+        with self._lock:
+            data_uri = self._entries.get(key)
+            if data_uri is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data_uri
+
+    def put(self, key: tuple[str, int, int], data_uri: str) -> None:
+        """Store a data URI, evicting least recently used entries."""
+        if len(data_uri) > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data_uri
+            self._size += len(data_uri)
+            while self._size > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+_CACHE = EncodedAttachmentCache(ATTACHMENT_CACHE_MAX_BYTES)
+
+
+def _data_uri(mime_type: str, filename: str, encoded: str) -> str:
+    """Return an attachment in the data URI form the Signal API expects."""
+    return f"data:{mime_type};filename={filename};base64,{encoded}"
+
+
+def check_local_attachment(hass: HomeAssistant, path: str) -> None:
+    """Check that a local path may be attached.
+
+    Resolves the path, so it must run in an executor.
+
+    Raises:
+        AttachmentError: If the path is outside allowlist_external_dirs.
+
+    """
+    if not hass.config.is_allowed_path(path):
+        raise AttachmentError(path, "is not in allowlist_external_dirs")
+
+
+def attachment_url(hass: HomeAssistant, url: str) -> str:
+    """Return the URL to fetch an attachment from.
+
+    Paths such as /api/camera_proxy/... are resolved against Home Assistant
+    itself.
+
+    Raises:
+        AttachmentError: If a path has no Home Assistant URL to resolve against
+            or another URL is not in allowlist_external_urls.
+
+    """
+    if url.startswith("/"):
+        try:
+            base_url = get_url(hass, prefer_external=False)
+        except NoURLAvailableError as err:
+            raise AttachmentError(url, "needs a Home Assistant URL") from err
+        return f"{base_url.rstrip('/')}{url}"
+    if not hass.config.is_allowed_external_url(url):
+        raise AttachmentError(url, "is not in allowlist_external_urls")
+    return url
+
+
+async def async_check_attachments(
+    hass: HomeAssistant, paths: list[str], urls: list[str]
+) -> None:
+    """Check that local paths and URLs may be attached, without reading them.
+
+    Used when a send is scheduled, so a request that can never be sent is
+    rejected right away. The files need not exist yet.
+
+    Raises:
+        AttachmentError: If a path or URL is not allowlisted.
+
+    """
+    for url in urls:
+        attachment_url(hass, url)
+    for path in paths:
+        await hass.async_add_executor_job(check_local_attachment, hass, path)
+
+
+def encode_local_attachment(
+    hass: HomeAssistant, path: str, max_size: int = ATTACHMENT_MAX_SIZE
+) -> str:
+    """Read an allowlisted local file and return it as a data URI.
+
+    Performs blocking file I/O, including the allowlist check, and must run in
+    an executor.
+
+    Raises:
+        AttachmentError: If the path is outside allowlist_external_dirs, is not
+            a regular file or exceeds max_size.
+        OSError: If the file cannot be read.
+
+    """
+    check_local_attachment(hass, path)
+    file_path = Path(path)
+    stat = file_path.stat()
+    if not file_path.is_file():
+        raise AttachmentError(path, "is not a regular file")
+    if stat.st_size > max_size:
+        raise AttachmentError(
+            path, f"is {stat.st_size} bytes, larger than the {max_size} byte limit"
+        )
+
+    key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+    if (data_uri := _CACHE.get(key)) is not None:
+        return data_uri
+
+    data = file_path.read_bytes()
+    if len(data) != stat.st_size:
+        # The file changed while it was being read; don't cache a torn copy.
+        raise AttachmentError(path, "changed while it was being read")
+
+    mime_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+    encoded = base64.b64encode(data).decode("ascii")
+    data_uri = _data_uri(mime_type, file_path.name, encoded)
+    _CACHE.put(key, data_uri)
+    return data_uri
+
+
+async def async_encode_attachments(hass: HomeAssistant, paths: list[str]) -> list[str]:
+    """Encode allowlisted local files as data URIs off the event loop.
+
+    Raises:
+        ValueError: If a path is outside allowlist_external_dirs or unreadable.
+
+    """
+    encoded = []
+    for path in paths:
+        try:
+            encoded.append(
+                await hass.async_add_executor_job(encode_local_attachment, hass, path)
+            )
+        except OSError as err:
+            raise AttachmentError(path, f"cannot be read: {err}") from err
+
+    if is_detailed(DEBUG_SUBSYSTEM_SEND):
+        _LOGGER.debug(
+            "Encoded %s local attachments (cache hits: %s, misses: %s)",
+            len(encoded),
+            _CACHE.hits,
+            _CACHE.misses,
+        )
+    return encoded
+
+
+def _url_filename(url: str, mime_type: str) -> str:
+    """Return a filename for a fetched attachment, with a fitting extension."""
+    name = PurePosixPath(unquote(urlsplit(url).path)).name or "attachment"
+    if mimetypes.guess_type(name)[0] != mime_type:
+        name += mimetypes.guess_extension(mime_type) or ""
+    return name
+
+
+async def _async_encode_stream(
+    hass: HomeAssistant, name: str, chunks: AsyncIterator[bytes], max_size: int
+) -> tuple[str, int]:
+    """Base64 encode a byte stream in blocks, off the event loop.
+
+    Blocks are a multiple of 3 bytes long, so their encodings concatenate into
+    the encoding of the whole stream. At most one block of raw bytes is held.
+    Returns the encoding and the number of bytes read.
+
+    Raises:
+        ValueError: If the stream is longer than max_size.
+
+    """
+    pieces: list[bytes] = []
+    pending = bytearray()
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_size:
+            raise AttachmentError(name, f"is larger than the {max_size} byte limit")
+        pending += chunk
+        if len(pending) >= ATTACHMENT_ENCODE_BLOCK:
+            aligned = len(pending) - len(pending) % 3
+            block = bytes(pending[:aligned])
+            del pending[:aligned]
+            pieces.append(await hass.async_add_executor_job(base64.b64encode, block))
+    if pending:
+        pieces.append(
+            await hass.async_add_executor_job(base64.b64encode, bytes(pending))
+        )
+    return b"".join(pieces).decode("ascii"), size
+
+
+class AttachmentFetcher:
+    """Fetch attachments from URLs and encode them as data URIs.
+
+    The URLs of one send are fetched concurrently over the shared client
+    session, with at most ATTACHMENT_FETCH_CONCURRENCY requests in flight per
+    entry. Paths such as /api/camera_proxy/... are fetched from Home Assistant
+    itself; other URLs must be in allowlist_external_urls.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the fetcher."""
+        self._hass = hass
+        self._semaphore = asyncio.Semaphore(ATTACHMENT_FETCH_CONCURRENCY)
+        self._timeout = aiohttp.ClientTimeout(total=ATTACHMENT_FETCH_TIMEOUT)
+        self.fetches = 0
+        self.fetched = 0
+        self.fetched_bytes = 0
+        self.errors = 0
+        self._total_ms = 0.0
+        self.last_fetch_ms = 0.0
+        self.max_fetch_ms = 0.0
+
+    async def async_fetch(self, urls: list[str]) -> list[str]:
+        """Fetch and encode URLs, returning data URIs in the same order.
+
+        Raises:
+            ValueError: If a URL cannot be fetched or exceeds the size limit.
+
+        """
+        if not urls:
+            return []
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(self._async_fetch_one(url) for url in urls), return_exceptions=True
+        )
+        elapsed = round((time.monotonic() - started) * 1000, 1)
+        self.fetches += 1
+        self._total_ms += elapsed
+        self.last_fetch_ms = elapsed
+        self.max_fetch_ms = max(self.max_fetch_ms, elapsed)
+
+        for result in results:
+            if isinstance(result, BaseException):
+                self.errors += 1
+                raise result
+        if is_detailed(DEBUG_SUBSYSTEM_SEND):
+            _LOGGER.debug("Fetched %s attachment URLs in %s ms", len(urls), elapsed)
+        return results
+
+    async def _async_fetch_one(self, url: str) -> str:
+        """Fetch one URL and return it as a data URI."""
+        url = attachment_url(self._hass, url)
+        session = async_get_clientsession(self._hass)
+        async with self._semaphore:
+            try:
+                async with session.get(url, timeout=self._timeout) as response:
+                    if response.status != HTTP_OK:
+                        raise AttachmentError(url, f"returned HTTP {response.status}")
+                    if (response.content_length or 0) > ATTACHMENT_MAX_SIZE:
+                        raise AttachmentError(
+                            url,
+                            f"is {response.content_length} bytes, larger than "
+                            f"the {ATTACHMENT_MAX_SIZE} byte limit",
+                        )
+                    encoded, size = await _async_encode_stream(
+                        self._hass,
+                        url,
+                        response.content.iter_chunked(ATTACHMENT_FETCH_CHUNK),
+                        ATTACHMENT_MAX_SIZE,
+                    )
+                    mime_type = response.content_type
+            except (aiohttp.ClientError, TimeoutError) as err:
+                raise AttachmentError(url, f"cannot be fetched: {err}") from err
+
+        self.fetched += 1
+        self.fetched_bytes += size
+        return _data_uri(mime_type, _url_filename(url, mime_type), encoded)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return fetch counters, kept apart from the send latency of the lanes."""
+        return {
+            "fetches": self.fetches,
+            "urls_fetched": self.fetched,
+            "bytes_fetched": self.fetched_bytes,
+            "errors": self.errors,
+            "avg_fetch_ms": (
+                round(self._total_ms / self.fetches, 1) if self.fetches else 0.0
+            ),
+            "last_fetch_ms": self.last_fetch_ms,
+            "max_fetch_ms": self.max_fetch_ms,
+        }
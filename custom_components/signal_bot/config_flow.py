@@ -1,25 +1,48 @@
 """Config flow handlers for setting up Signal Bot integration in Home Assistant UI."""
 
-import logging
 import re
 from typing import Any
 
 import aiohttp
 from homeassistant import config_entries
+from homeassistant.core import callback
 import voluptuous as vol
 
 from .const import (
     API_ENDPOINT_HEALTH,
     CONF_API_URL,
+    CONF_ATTACHMENT_MAX_AGE,
+    CONF_ATTACHMENT_QUOTA,
+    CONF_HISTORY_ATTRIBUTE,
+    CONF_INGEST_WATERMARK,
     CONF_PHONE_NUMBER,
+    CONF_RAW_MAX_BYTES,
+    CONF_RAW_RETENTION,
+    CONF_SCHEDULE_DIGEST,
+    CONF_SUPPRESSION,
+    CONF_SUPPRESSION_WINDOW,
+    CONF_THUMBNAILS,
     DEFAULT_API_URL,
+    DEFAULT_ATTACHMENT_MAX_AGE,
+    DEFAULT_ATTACHMENT_QUOTA,
+    DEFAULT_HISTORY_ATTRIBUTE,
+    DEFAULT_INGEST_WATERMARK,
+    DEFAULT_RAW_MAX_BYTES,
+    DEFAULT_RAW_RETENTION,
+    DEFAULT_SCHEDULE_DIGEST,
+    DEFAULT_SUPPRESSION,
+    DEFAULT_SUPPRESSION_WINDOW,
+    DEFAULT_THUMBNAILS,
     DEFAULT_TIMEOUT,
     DOMAIN,
     HTTP_OK,
     LOG_PREFIX_SETUP,
+    RAW_RETENTION_POLICIES,
+    SUPPRESSION_MODES,
 )
+from .debug import get_logger
 
-_LOGGER = logging.getLogger(__name__)
+_LOGGER = get_logger(__name__, LOG_PREFIX_SETUP)
 
 # Schema for the setup form
 CONFIG_SCHEMA = vol.Schema(
@@ -29,6 +52,36 @@ CONFIG_SCHEMA = vol.Schema(
     }
 )
 
+# Schema for the options form
+OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_THUMBNAILS, default=DEFAULT_THUMBNAILS): bool,
+        vol.Optional(CONF_RAW_RETENTION, default=DEFAULT_RAW_RETENTION): vol.In(
+            RAW_RETENTION_POLICIES
+        ),
+        vol.Optional(CONF_RAW_MAX_BYTES, default=DEFAULT_RAW_MAX_BYTES): vol.All(
+            vol.Coerce(int), vol.Range(min=256)
+        ),
+        vol.Optional(CONF_INGEST_WATERMARK, default=DEFAULT_INGEST_WATERMARK): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+        vol.Optional(CONF_HISTORY_ATTRIBUTE, default=DEFAULT_HISTORY_ATTRIBUTE): bool,
+        vol.Optional(CONF_SUPPRESSION, default=DEFAULT_SUPPRESSION): vol.In(
+            SUPPRESSION_MODES
+        ),
+        vol.Optional(
+            CONF_SUPPRESSION_WINDOW, default=DEFAULT_SUPPRESSION_WINDOW
+        ): vol.All(vol.Coerce(int), vol.Range(min=10)),
+        vol.Optional(CONF_ATTACHMENT_QUOTA, default=DEFAULT_ATTACHMENT_QUOTA): vol.All(
+            vol.Coerce(int), vol.Range(min=0)
+        ),
+        vol.Optional(
+            CONF_ATTACHMENT_MAX_AGE, default=DEFAULT_ATTACHMENT_MAX_AGE
+        ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Optional(CONF_SCHEDULE_DIGEST, default=DEFAULT_SCHEDULE_DIGEST): bool,
+    }
+)
+
 # Regular expression to validate phone numbers with country code
 PHONE_NUMBER_REGEX = re.compile(r"^\+\d{1,15}$")  # + followed by 1-15 digits
 
@@ -38,6 +91,14 @@ class SignalBotConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> "SignalBotOptionsFlow":
+        """Return the options flow handler."""
+        return SignalBotOptionsFlow()
+
     async def validate_input(self, api_url: str, phone_number: str) -> dict[str, str]:
         """Validate the user input."""
         errors = {}
@@ -45,16 +106,12 @@ class SignalBotConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         # Validate API URL format
         if not (api_url.startswith("http://") or api_url.startswith("https://")):
             errors[CONF_API_URL] = "invalid_api_url"
-            _LOGGER.error(
-                f"{LOG_PREFIX_SETUP} API URL must start with http:// or https://"
-            )
+            _LOGGER.error("API URL must start with http:// or https://")
 
         # Validate phone number format
         if not PHONE_NUMBER_REGEX.match(phone_number):
             errors[CONF_PHONE_NUMBER] = "invalid_phone"
-            _LOGGER.error(
-                f"{LOG_PREFIX_SETUP} Invalid phone number format: %s", phone_number
-            )
+            _LOGGER.error("Invalid phone number format: %s", phone_number)
 
         return errors
 
@@ -64,7 +121,7 @@ class SignalBotConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         health_endpoint = f"{api_url}{API_ENDPOINT_HEALTH}"
 
         _LOGGER.debug(
-            f"{LOG_PREFIX_SETUP} Testing Signal Bot health endpoint: %s",
+            "Testing Signal Bot health endpoint: %s",
             health_endpoint,
         )
 
@@ -75,31 +132,26 @@ class SignalBotConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             ):
                 if response.status in (HTTP_OK, 204):
                     _LOGGER.info(
-                        f"{LOG_PREFIX_SETUP} Successfully connected to Signal Bot "
-                        "health endpoint: %s",
+                        "Successfully connected to Signal Bot health endpoint: %s",
                         health_endpoint,
                     )
                 else:
                     _LOGGER.error(
-                        f"{LOG_PREFIX_SETUP} Unexpected HTTP response: %s",
+                        "Unexpected HTTP response: %s",
                         response.status,
                     )
                     errors["base"] = "invalid_response"
         except TimeoutError:
-            _LOGGER.exception(
-                f"{LOG_PREFIX_SETUP} Connection to %s timed out.", health_endpoint
-            )
+            _LOGGER.exception("Connection to %s timed out.", health_endpoint)
             errors["base"] = "timeout"
         except aiohttp.ClientConnectionError:
             _LOGGER.exception(
-                f"{LOG_PREFIX_SETUP} Failed to connect to %s. Connection refused",
+                "Failed to connect to %s. Connection refused",
                 health_endpoint,
             )
             errors["base"] = "connection_refused"
         except Exception:
-            _LOGGER.exception(
-                f"{LOG_PREFIX_SETUP} An unexpected error occurred during health check"
-            )
+            _LOGGER.exception("An unexpected error occurred during health check")
             errors["base"] = "unknown_error"
 
         return errors
@@ -123,9 +175,7 @@ class SignalBotConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             if not errors:
                 # Proceed with successful setup
-                _LOGGER.info(
-                    f"{LOG_PREFIX_SETUP} Signal Bot setup completed successfully."
-                )
+                _LOGGER.info("Signal Bot setup completed successfully.")
                 return self.async_create_entry(
                     title="Signal Bot",
                     data={
@@ -138,3 +188,22 @@ class SignalBotConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="user", data_schema=CONFIG_SCHEMA, errors=errors
         )
+
+
+class SignalBotOptionsFlow(config_entries.OptionsFlow):
+    """Options flow for Signal Bot integration."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.FlowResult:
+        """Manage the integration options."""
+        if user_input is not None:
+            _LOGGER.info("Signal Bot options updated.")
+            return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                OPTIONS_SCHEMA, self.config_entry.options
+            ),
+        )
@@ -9,23 +9,75 @@ CONF_PHONE_NUMBER = "phone_number"
 DEFAULT_API_URL = "http://localhost:8080"
 DEFAULT_PHONE_NUMBER = "+0000000000"
 
+# YAML configuration of inbound commands
+CONF_COMMANDS = "commands"
+CONF_EXACT = "exact"
+CONF_PREFIX = "prefix"
+CONF_REGEX = "regex"
+CONF_SENDERS = "senders"
+CONF_GROUPS = "groups"
+CONF_REPLY = "reply"
+
+# Options
+CONF_THUMBNAILS = "thumbnails"
+DEFAULT_THUMBNAILS = False
+CONF_RAW_RETENTION = "raw_retention"
+CONF_RAW_MAX_BYTES = "raw_max_bytes"
+DEFAULT_RAW_MAX_BYTES = 16384
+
+# Raw envelope retention policies
+RAW_RETENTION_OFF = "off"
+RAW_RETENTION_LATEST_DATA = "latest_data"
+RAW_RETENTION_RING = "ring"
+RAW_RETENTION_POLICIES = [
+    RAW_RETENTION_OFF,
+    RAW_RETENTION_LATEST_DATA,
+    RAW_RETENTION_RING,
+]
+DEFAULT_RAW_RETENTION = RAW_RETENTION_LATEST_DATA
+RAW_RING_SIZE = 25  # envelopes kept by the ring policy
+CONF_INGEST_WATERMARK = "ingest_watermark"
+DEFAULT_INGEST_WATERMARK = 200  # queued envelopes before shedding starts
+CONF_ATTACHMENT_QUOTA = "attachment_quota"
+DEFAULT_ATTACHMENT_QUOTA = 0  # MiB of received attachments kept, 0 = no limit
+CONF_ATTACHMENT_MAX_AGE = "attachment_max_age"
+DEFAULT_ATTACHMENT_MAX_AGE = 0  # days a received attachment is kept, 0 = forever
+CONF_SCHEDULE_DIGEST = "schedule_digest"
+DEFAULT_SCHEDULE_DIGEST = False  # merge scheduled sends that come due together
+CONF_HISTORY_ATTRIBUTE = "history_attribute"
+DEFAULT_HISTORY_ATTRIBUTE = True
+CONF_SUPPRESSION = "suppression"
+CONF_SUPPRESSION_WINDOW = "suppression_window"
+DEFAULT_SUPPRESSION_WINDOW = 300  # seconds
+
+# Outbound repeat suppression modes
+SUPPRESSION_OFF = "off"
+SUPPRESSION_DROP = "drop"
+SUPPRESSION_DIGEST = "digest"
+SUPPRESSION_MODES = [SUPPRESSION_OFF, SUPPRESSION_DROP, SUPPRESSION_DIGEST]
+DEFAULT_SUPPRESSION = SUPPRESSION_OFF
+SUPPRESSION_MAX_KEYS = 1000  # suppression windows open at once
+
 # API endpoints and routes
 API_ENDPOINT_RECEIVE = "/v1/receive/{phone_number}"  # Updated format
 API_ENDPOINT_HEALTH = "/v1/health"
 API_ENDPOINT_GROUPS = "/v1/groups/{phone_number}/{group_id}"
 API_ENDPOINT_ATTACHMENTS = "/v1/attachments/{attachment_id}"
 API_ENDPOINT_SEND = "/v1/send"
+API_ENDPOINT_CONTACTS = "/v1/contacts/{phone_number}"
 
 # HTTP Response codes
 HTTP_OK = 200
 HTTP_CREATED = 201
 HTTP_BAD_REQUEST = 400
+HTTP_TOO_MANY_REQUESTS = 429
+HTTP_SERVER_ERROR = 500
 
 # Sensor attribute names
 ATTR_LATEST_MESSAGE = "latest_message"
 ATTR_ALL_MESSAGES = "all_messages"
 ATTR_TYPING_STATUS = "typing_status"
-ATTR_FULL_MESSAGE = "full_message"
+ATTR_MESSAGE_COUNT = "message_count"
 ATTR_MESSAGE_TYPE = "message_type"
 ATTR_GROUP_ID = "group_id"
 ATTR_GROUP_NAME = "group_name"
@@ -43,22 +95,107 @@ MESSAGE_TYPE_TEXT = "text"
 MESSAGE_TYPE_ATTACHMENT = "attachment"
 MESSAGE_TYPE_TYPING = "typing"
 
+# Ingest priorities, lower is handled first
+INGEST_PRIORITY_DATA = 0
+INGEST_PRIORITY_GROUP_UPDATE = 1
+INGEST_PRIORITY_TYPING = 2
+INGEST_PRIORITY_RECEIPT = 3
+
 # WebSocket-related constants
 DEFAULT_RECONNECT_INTERVAL = 5  # seconds
 MAX_RECONNECT_DELAY = 300  # seconds
 WS_TIMEOUT = 10  # seconds for WebSocket operations
 
+# REST polling fallback when the WebSocket cannot be established
+TRANSPORT_WEBSOCKET = "websocket"
+TRANSPORT_POLLING = "polling"
+WS_FALLBACK_FAILURES = 3  # failed WebSocket attempts before polling
+WS_REPROBE_INTERVAL = 300  # seconds between WebSocket probes while polling
+POLL_INTERVAL_MIN = 1.0  # seconds between polls while messages arrive
+POLL_INTERVAL_MAX = 30.0  # seconds between polls when idle
+POLL_BACKOFF_FACTOR = 1.5  # interval growth per empty poll
+
 # Attachment paths
 ATTACHMENTS_DIR = "www/signal_bot"
 LOCAL_PATH_PREFIX = "/local/signal_bot"
+THUMBNAILS_SUBDIR = "thumbnails"
+
+# Cleanup of received attachments
+JANITOR_INTERVAL = 60 * 60  # seconds between cleanup runs
+JANITOR_STARTUP_DELAY = 5 * 60  # seconds after setup before the first run
+JANITOR_GRACE = 5 * 60  # seconds a new file is protected before history has it
+
+# Outgoing local file attachments
+ATTACHMENT_MAX_SIZE = 10 * 1024 * 1024  # bytes per file
+ATTACHMENT_CACHE_MAX_BYTES = 32 * 1024 * 1024  # encoded bytes kept in memory
+
+# Outgoing attachments fetched from URLs
+ATTACHMENT_FETCH_TIMEOUT = 30  # seconds per URL, including the body
+ATTACHMENT_FETCH_CONCURRENCY = 4  # URLs fetched at once per entry
+ATTACHMENT_FETCH_CHUNK = 64 * 1024  # bytes read from the response at a time
+ATTACHMENT_ENCODE_BLOCK = 3 * 256 * 1024  # bytes encoded per executor job
+
+# Broadcast sends
+BROADCAST_BATCH_SIZE = 10  # individual recipients per send request
+BROADCAST_CONCURRENCY = 4  # send requests in flight at once
+
+# Outbound priority lanes: priority -> (concurrency, sends per second or None)
+PRIORITY_CRITICAL = "critical"
+PRIORITY_NORMAL = "normal"
+PRIORITY_BULK = "bulk"
+PRIORITIES = [PRIORITY_CRITICAL, PRIORITY_NORMAL, PRIORITY_BULK]
+OUTBOUND_LANES: dict[str, tuple[int, float | None]] = {
+    PRIORITY_CRITICAL: (4, None),
+    PRIORITY_NORMAL: (2, 5.0),
+    PRIORITY_BULK: (1, 1.0),
+}
+
+# Delivery receipt tracking
+DELIVERY_TRACK_MAX = 1000  # sent messages tracked at once
+DELIVERY_TRACK_TTL = 24 * 60 * 60  # seconds a sent message stays tracked
+DELIVERY_DEADLINE = 120  # seconds for a critical message to be delivered
+DELIVERY_LATENCY_BUCKETS = (1, 5, 15, 60, 300, 900, 3600)  # seconds
+
+# Contact directory
+CONTACTS_TTL = 6 * 60 * 60  # seconds before the contact list is fetched again
+CONTACTS_RETRY = 5 * 60  # seconds before a failed fetch is retried
+CONTACTS_MAX = 5000  # names kept at once
+
+# Thumbnail generation
+THUMBNAIL_SIZES = {"thumbnail": 160, "preview": 640}  # longest edge in pixels
+THUMBNAIL_QUALITY = 80  # JPEG quality
+THUMBNAIL_WORKERS = 2  # worker processes
+
+# Runtime data keys in hass.data[DOMAIN][entry_id]
+DATA_THUMBNAIL_POOL = "thumbnail_pool"
+DATA_RAW_ENVELOPES = "raw_envelopes"
+DATA_INGEST = "ingest"
+DATA_OUTBOUND = "outbound"
+DATA_DELIVERY = "delivery"
+DATA_TRANSPORT = "transport"
+DATA_SUPPRESSION = "suppression"
+DATA_HISTORY = "history"
+DATA_JANITOR = "janitor"
+DATA_CONTACTS = "contacts"
+DATA_ATTACHMENT_FETCHER = "attachment_fetcher"
+DATA_SCHEDULER = "scheduler"
+
+# Data keys in hass.data[DOMAIN] shared by all entries
+DATA_COMMAND_ROUTER = "command_router"
+
+# Dispatcher signal carrying history deltas: (entry_id, delta)
+DISPATCHER_HISTORY_DELTA = f"{DOMAIN}_history_delta"
 
 # Event names
 EVENT_SIGNAL_MESSAGE = "signal_message_received"
+EVENT_DELIVERY_OVERDUE = "signal_bot_delivery_overdue"
 
 # Log message prefixes
 LOG_PREFIX_WS = "[SignalBot WebSocket]"
 LOG_PREFIX_SEND = "[SignalBot SendMessage]"
 LOG_PREFIX_UTILS = "[SignalBot Utils]"
+LOG_PREFIX_ATTACHMENTS = "[SignalBot Attachments]"
+LOG_PREFIX_ROUTER = "[SignalBot Router]"
 LOG_PREFIX_SENSOR = "[SignalBot Sensor]"
 LOG_PREFIX_SETUP = "[SignalBot Setup]"
 
@@ -71,6 +208,37 @@ SIGNAL_STATE_ERROR = "error"
 # Update intervals and timeouts
 DEFAULT_UPDATE_INTERVAL = 60  # seconds
 DEFAULT_TIMEOUT = 10  # seconds
+STATE_WRITE_COOLDOWN = 0.5  # seconds between coalesced state writes
+
+# Message history and persistence
+MAX_MESSAGE_HISTORY = 100  # messages kept in memory and in the snapshot
+HISTORY_PAGE_SIZE = 25  # default page size of the signal_bot/history command
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.{{entry_id}}.history"
+STORAGE_SAVE_DELAY = 10  # seconds, coalesces bursts into a single write
+
+# Scheduled sends
+SCHEDULE_STORAGE_VERSION = 1
+SCHEDULE_STORAGE_KEY = f"{DOMAIN}.{{entry_id}}.scheduled"
+SCHEDULE_SAVE_DELAY = 1  # seconds, coalesces bursts of scheduled sends
+SCHEDULE_MAX_PENDING = 10000  # scheduled sends kept at once per entry
+SCHEDULE_SLACK = 1  # seconds; sends due this close together are sent together
+SCHEDULE_RETRIES = 3  # retries of a scheduled send that failed transiently
+SCHEDULE_RETRY_DELAY = 60  # seconds before the first retry, doubled for each next
 
 # Debug levels
-DEBUG_DETAILED = False  # Set to True to enable very detailed debug logging
+DEBUG_DETAILED = False  # Default for detailed logging; toggle with set_debug
+DEBUG_SUBSYSTEM_WS = "websocket"
+DEBUG_SUBSYSTEM_SENSOR = "sensor"
+DEBUG_SUBSYSTEM_SEND = "send"
+DEBUG_SUBSYSTEM_UTILS = "utils"
+DEBUG_SUBSYSTEM_SETUP = "setup"
+DEBUG_SUBSYSTEMS = [
+    DEBUG_SUBSYSTEM_WS,
+    DEBUG_SUBSYSTEM_SENSOR,
+    DEBUG_SUBSYSTEM_SEND,
+    DEBUG_SUBSYSTEM_UTILS,
+    DEBUG_SUBSYSTEM_SETUP,
+]
+DEFAULT_DEBUG_SAMPLE_RATE = 1  # log 1 in N high-volume records
+DEFAULT_DEBUG_MAX_PAYLOAD = 2000  # characters of a payload written to the log
@@ -0,0 +1,177 @@
+"""Cached display names of Signal contacts."""
+
+import asyncio
+import time
+from typing import Any
+
+import aiohttp
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    API_ENDPOINT_CONTACTS,
+    CONTACTS_MAX,
+    CONTACTS_RETRY,
+    CONTACTS_TTL,
+    DEBUG_SUBSYSTEM_SENSOR,
+    DEFAULT_TIMEOUT,
+    DOMAIN,
+    HTTP_OK,
+    LOG_PREFIX_SENSOR,
+)
+from .debug import get_logger, is_detailed
+
+_LOGGER = get_logger(__name__, LOG_PREFIX_SENSOR)
+
+
+def contact_name(contact: dict[str, Any]) -> str | None:
+    """Return the display name of a contact from the contacts endpoint.
+
+    The name saved in the address book wins over the profile name the
+    contact chose, which wins over their username.
+    """
+    if name := contact.get("name") or contact.get("profile_name"):
+        return name
+    profile = contact.get("profile") or {}
+    parts = [profile.get("given_name"), profile.get("lastname")]
+    if name := " ".join(part for part in parts if part):
+        return name
+    return contact.get("username") or None
+
+
+class ContactDirectory:
+    """Resolve sender numbers and UUIDs to display names without HTTP per message.
+
+    The full contact list is fetched in one request and again once it is older
+    than CONTACTS_TTL; the refresh runs in the background and lookups use the
+    current names meanwhile. The sourceName of received envelopes updates the
+    directory as messages arrive.
+    """
+
+    def __init__(self, hass: HomeAssistant, api_url: str, phone_number: str) -> None:
+        """Initialize the directory."""
+        self._hass = hass
+        self._url = (
+            f"{api_url.rstrip('/')}"
+            f"{API_ENDPOINT_CONTACTS.format(phone_number=phone_number)}"
+        )
+        self._names: dict[str, str] = {}
+        self._next_refresh = 0.0
+        self._refresh_task: asyncio.Task | None = None
+        self.hits = 0
+        self.misses = 0
+        self.learned = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_refresh_ms = 0.0
+
+    @callback
+    def resolve(self, envelope: dict[str, Any]) -> str | None:
+        """Return the display name of an envelope's sender, or None."""
+        self._async_refresh_if_stale()
+        keys = [
+            key
+            for key in (
+                envelope.get("sourceNumber"),
+                envelope.get("sourceUuid"),
+                envelope.get("source"),
+            )
+            if key
+        ]
+        if name := envelope.get("sourceName"):
+            for key in keys:
+                self._learn(key, name)
+            return name
+
+        for key in keys:
+            if name := self._names.get(key):
+                self.hits += 1
+                return name
+        self.misses += 1
+        return None
+
+    def _learn(self, key: str, name: str) -> None:
+        """Store a name seen in an envelope."""
+        if self._names.get(key) == name:
+            return
+        if key not in self._names and len(self._names) >= CONTACTS_MAX:
+            return
+        self._names[key] = name
+        self.learned += 1
+
+    @callback
+    def _async_refresh_if_stale(self) -> None:
+        """Start a background refresh when the contact list is too old."""
+        if self._refresh_task is None and time.monotonic() >= self._next_refresh:
+            self._refresh_task = self._hass.async_create_background_task(
+                self._async_refresh(), f"{DOMAIN} contacts refresh"
+            )
+
+    async def _async_refresh(self) -> None:
+        """Merge the current contact list into the names.
+
+        Names learned from envelopes of senders who are not in the contact
+        list are kept.
+        """
+        started = time.monotonic()
+        session = async_get_clientsession(self._hass)
+        try:
+            async with session.get(self._url, timeout=DEFAULT_TIMEOUT) as response:
+                if response.status != HTTP_OK:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info,
+                        response.history,
+                        status=response.status,
+                        message=await response.text(),
+                    )
+                contacts = await response.json(content_type=None) or []
+        except (aiohttp.ClientError, TimeoutError, ValueError) as err:
+            _LOGGER.warning("Failed to fetch contacts: %s", err)
+            self.refresh_errors += 1
+            self._next_refresh = time.monotonic() + CONTACTS_RETRY
+            return
+        finally:
+            self._refresh_task = None
+
+        loaded = 0
+        for contact in contacts:
+            if not (name := contact_name(contact)):
+                continue
+            for key in (contact.get("number"), contact.get("uuid")):
+                if key and (key in self._names or len(self._names) < CONTACTS_MAX):
+                    self._names[key] = name
+                    loaded += 1
+        self.refreshes += 1
+        self.last_refresh_ms = round((time.monotonic() - started) * 1000, 1)
+        self._next_refresh = time.monotonic() + CONTACTS_TTL
+        if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
+            _LOGGER.debug(
+                "Loaded %s contact names in %s ms", loaded, self.last_refresh_ms
+            )
+
+    @callback
+    def async_start(self) -> None:
+        """Load the contact list in the background."""
+        self._async_refresh_if_stale()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel a running refresh."""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return directory size and lookup counters."""
+        lookups = self.hits + self.misses
+        return {
+            "names": len(self._names),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "learned": self.learned,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "last_refresh_ms": self.last_refresh_ms,
+        }
@@ -0,0 +1,145 @@
+"""Runtime-switchable detailed debug logging."""
+
+from collections.abc import Callable, Iterable, Iterator, MutableMapping
+import itertools
+import json
+import logging
+from typing import Any
+
+from .const import (
+    DEBUG_DETAILED,
+    DEBUG_SUBSYSTEMS,
+    DEFAULT_DEBUG_MAX_PAYLOAD,
+    DEFAULT_DEBUG_SAMPLE_RATE,
+)
+
+_PACKAGE_LOGGER = logging.getLogger(__package__)
+
+
+class SignalBotLogger(logging.LoggerAdapter):
+    """Logger that prefixes messages with a subsystem tag.
+
+    The prefix is added in process(), which the logging module only calls for
+    records that are actually emitted.
+    """
+
+    def __init__(self, logger: logging.Logger, prefix: str) -> None:
+        """Initialize the adapter."""
+        super().__init__(logger, {})
+        self.prefix = prefix
+
+    def process(
+        self, msg: Any, kwargs: MutableMapping[str, Any]
+    ) -> tuple[Any, MutableMapping[str, Any]]:
+        """Prefix the message."""
+        return f"{self.prefix} {msg}", kwargs
+
+
+def get_logger(name: str, prefix: str) -> SignalBotLogger:
+    """Return a prefixed logger for a module."""
+    return SignalBotLogger(logging.getLogger(name), prefix)
+
+
+class DebugSettings:
+    """Which subsystems log detailed output, and how much of it."""
+
+    def __init__(self) -> None:
+        """Initialize with the defaults from const.py."""
+        self.enabled: set[str] = set(DEBUG_SUBSYSTEMS) if DEBUG_DETAILED else set()
+        self.sample_rate = DEFAULT_DEBUG_SAMPLE_RATE
+        self.max_payload = DEFAULT_DEBUG_MAX_PAYLOAD
+        self._counters: dict[tuple[str, str], Iterator[int]] = {}
+        self._previous_level: int | None = None
+
+    def configure(
+        self,
+        subsystems: Iterable[str],
+        enabled: bool,
+        sample_rate: int | None = None,
+        max_payload: int | None = None,
+    ) -> None:
+        """Enable or disable detailed logging for subsystems.
+
+        Enabling also lowers the integration's logger to DEBUG so the output is
+        visible; the previous level is restored once all subsystems are off.
+        """
+        if enabled:
+            self.enabled.update(subsystems)
+        else:
+            self.enabled.difference_update(subsystems)
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if max_payload is not None:
+            self.max_payload = max_payload
+
+        if self.enabled and self._previous_level is None:
+            self._previous_level = _PACKAGE_LOGGER.level
+            if not _PACKAGE_LOGGER.isEnabledFor(logging.DEBUG):
+                _PACKAGE_LOGGER.setLevel(logging.DEBUG)
+        elif not self.enabled and self._previous_level is not None:
+            _PACKAGE_LOGGER.setLevel(self._previous_level)
+            self._previous_level = None
+
+    def sample(self, subsystem: str, site: str) -> bool:
+        """Return True for one in every sample_rate calls from a call site.
+
+        Each call site of a subsystem is counted on its own, so a frequent one
+        does not skew which records of another are logged.
+        """
+        if subsystem not in self.enabled:
+            return False
+        if (counter := self._counters.get((subsystem, site))) is None:
+            counter = self._counters[subsystem, site] = itertools.count()
+        return next(counter) % self.sample_rate == 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the current settings."""
+        return {
+            "enabled": sorted(self.enabled),
+            "sample_rate": self.sample_rate,
+            "max_payload": self.max_payload,
+        }
+
+
+SETTINGS = DebugSettings()
+
+
+def is_detailed(subsystem: str) -> bool:
+    """Return True if detailed logging is on for a subsystem."""
+    return subsystem in SETTINGS.enabled
+
+
+def sample(subsystem: str, site: str) -> bool:
+    """Return True if this high-volume record from site should be logged."""
+    return SETTINGS.sample(subsystem, site)
+
+
+class Payload:
+    """Log argument that serializes and truncates its value only when emitted.
+
+    Accepts a value or a zero-argument callable producing it, so expensive
+    values such as exported attributes are not even built unless logged.
+    """
+
+    __slots__ = ("_value",)
+
+    def __init__(self, value: Any | Callable[[], Any]) -> None:
+        """Wrap a value."""
+        self._value = value
+
+    def __str__(self) -> str:
+        """Return the value as text, truncated to the configured size."""
+        value = self._value() if callable(self._value) else self._value
+        if isinstance(value, str | bytes):
+            text = value if isinstance(value, str) else value.decode(errors="replace")
+        else:
+            try:
+                text = json.dumps(value, default=repr)
+            except (TypeError, ValueError):
+                text = repr(value)
+        limit = SETTINGS.max_payload
+        if len(text) > limit:
+            return f"{text[:limit]}... ({len(text) - limit} more characters)"
+        return text
+
+    __repr__ = __str__
@@ -0,0 +1,155 @@
+"""Prioritized ingest queue for envelopes received from Signal."""
+
+import asyncio
+from collections.abc import Callable, Coroutine
+import heapq
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DEBUG_SUBSYSTEM_SENSOR,
+    INGEST_PRIORITY_DATA,
+    INGEST_PRIORITY_GROUP_UPDATE,
+    INGEST_PRIORITY_RECEIPT,
+    INGEST_PRIORITY_TYPING,
+    LOG_PREFIX_SENSOR,
+)
+from .debug import get_logger, is_detailed
+
+_LOGGER = get_logger(__name__, LOG_PREFIX_SENSOR)
+
+EnvelopeHandler = Callable[[dict[str, Any]], Coroutine[Any, Any, None]]
+# Returns True for a low-priority message that must not be dropped
+EnvelopeFilter = Callable[[dict[str, Any]], bool]
+
+
+def classify_envelope(message: dict[str, Any]) -> tuple[int, str]:
+    """Return the ingest priority and kind of a received message."""
+    envelope = message.get("envelope", {})
+    if data_message := envelope.get("dataMessage"):
+        group_info = data_message.get("groupInfo") or {}
+        if group_info.get("type") == "UPDATE" and not data_message.get("message"):
+            return INGEST_PRIORITY_GROUP_UPDATE, "group_update"
+    if data_message or envelope.get("editMessage"):
+        return INGEST_PRIORITY_DATA, "data"
+    if envelope.get("typingMessage"):
+        return INGEST_PRIORITY_TYPING, "typing"
+    if envelope.get("receiptMessage"):
+        return INGEST_PRIORITY_RECEIPT, "receipt"
+    if envelope.get("syncMessage"):
+        return INGEST_PRIORITY_RECEIPT, "sync"
+    return INGEST_PRIORITY_RECEIPT, "other"
+
+
+class IngestPipeline:
+    """Queue envelopes by priority and hand them to a single consumer.
+
+    Data messages are handled before group updates, typing indicators and
+    receipts. Typing frames from the same sender are collapsed while queued,
+    so only the latest one is handled. Once the queue reaches the watermark,
+    receipts and other low-priority frames are dropped unless protect returns
+    True for them. Data messages are never dropped.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        handler: EnvelopeHandler,
+        watermark: int,
+        protect: EnvelopeFilter,
+    ) -> None:
+        """Initialize the pipeline."""
+        self._hass = hass
+        self._handler = handler
+        self._watermark = watermark
+        self._protect = protect
+        self._queue: list[tuple[int, int, float, Any]] = []
+        self._sequence = 0
+        self._pending_typing: dict[str, dict[str, Any]] = {}
+        self._wakeup: asyncio.Future[None] | None = None
+        self.received = 0
+        self.processed = 0
+        self.collapsed = 0
+        self.shed: dict[str, int] = {}
+        self.protected = 0
+        self.max_depth = 0
+        self.last_data_lag_ms = 0.0
+        self.max_data_lag_ms = 0.0
+
+    def submit(self, message: dict[str, Any]) -> None:
+        """Queue a message. Safe to call from any thread."""
+        self._hass.loop.call_soon_threadsafe(self._async_put, message)
+
+    @callback
+    def _async_put(self, message: dict[str, Any]) -> None:
+        """Queue a message from the event loop."""
+        self.received += 1
+        priority, kind = classify_envelope(message)
+        behind = len(self._queue) >= self._watermark
+
+        item: Any = message
+        if priority == INGEST_PRIORITY_TYPING:
+            source = message.get("envelope", {}).get("source", "unknown")
+            queued = source in self._pending_typing
+            self._pending_typing[source] = message
+            if queued:
+                self.collapsed += 1
+                return
+            item = source
+        elif behind and priority == INGEST_PRIORITY_RECEIPT:
+            if not self._protect(message):
+                self.shed[kind] = self.shed.get(kind, 0) + 1
+                if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
+                    _LOGGER.debug(
+                        "Ingest queue at %s, dropped %s frame",
+                        len(self._queue),
+                        kind,
+                    )
+                return
+            self.protected += 1
+
+        self._sequence += 1
+        heapq.heappush(self._queue, (priority, self._sequence, time.monotonic(), item))
+        self.max_depth = max(self.max_depth, len(self._queue))
+        if self._wakeup is not None:
+            self._wakeup.set_result(None)
+            self._wakeup = None
+
+    async def async_run(self) -> None:
+        """Handle queued messages until cancelled."""
+        while True:
+            if not self._queue:
+                self._wakeup = self._hass.loop.create_future()
+                await self._wakeup
+                continue
+
+            priority, _, queued_at, item = heapq.heappop(self._queue)
+            if priority == INGEST_PRIORITY_TYPING:
+                item = self._pending_typing.pop(item)
+            elif priority == INGEST_PRIORITY_DATA:
+                self.last_data_lag_ms = round((time.monotonic() - queued_at) * 1000, 1)
+                self.max_data_lag_ms = max(self.max_data_lag_ms, self.last_data_lag_ms)
+
+            try:
+                await self._handler(item)
+            except Exception:
+                _LOGGER.exception("Error processing envelope")
+            self.processed += 1
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return ingest counters."""
+        return {
+            "queue_depth": len(self._queue),
+            "max_queue_depth": self.max_depth,
+            "watermark": self._watermark,
+            "received": self.received,
+            "processed": self.processed,
+            "typing_collapsed": self.collapsed,
+            "shed": dict(self.shed),
+            "protected": self.protected,
+            "last_data_lag_ms": self.last_data_lag_ms,
+            "max_data_lag_ms": self.max_data_lag_ms,
+        }
@@ -0,0 +1,238 @@
+"""Periodic cleanup of received attachments."""
+
+from collections.abc import Callable
+from datetime import timedelta
+import os
+from pathlib import Path
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+
+from .const import (
+    ATTACHMENTS_DIR,
+    DEBUG_SUBSYSTEM_SENSOR,
+    JANITOR_GRACE,
+    JANITOR_INTERVAL,
+    JANITOR_STARTUP_DELAY,
+    LOG_PREFIX_ATTACHMENTS,
+)
+from .debug import get_logger, is_detailed
+
+_LOGGER = get_logger(__name__, LOG_PREFIX_ATTACHMENTS)
+
+
+def _scan(root: str) -> list[tuple[str, int, float]]:
+    """Return (relative path, size, mtime) of every file below root."""
+    files = []
+    pending = [root]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append(
+                            (
+                                os.path.relpath(entry.path, root),
+                                stat.st_size,
+                                stat.st_mtime,
+                            )
+                        )
+        except FileNotFoundError:
+            continue
+    return files
+
+
+def clean_attachments(
+    root: str,
+    quota: int,
+    max_age: float,
+    referenced: set[str],
+    last_referenced: dict[str, float],
+) -> dict[str, Any]:
+    """Delete expired files, then the least recently referenced over the quota.
+
+    Runs in an executor. Files in referenced and files younger than
+    JANITOR_GRACE are never deleted. A file was last referenced when it was
+    written or, if later, when it was last seen in the message history.
+
+    Args:
+        root: Attachments directory.
+        quota: Maximum total size in bytes, or 0 for no limit.
+        max_age: Maximum seconds since a file was last referenced, or 0.
+        referenced: Relative paths of files the message history uses.
+        last_referenced: Last time each relative path was seen referenced.
+
+    Returns:
+        Counters of the run and the relative paths that were removed.
+
+    """
+    started = time.monotonic()
+    now = time.time()
+    total = 0
+    reclaimed = 0
+    errors = 0
+    removed: list[str] = []
+    candidates: list[tuple[float, int, str]] = []
+
+    def delete(path: str) -> bool:
+        nonlocal errors
+        try:
+            Path(root, path).unlink(missing_ok=True)
+        except OSError:
+            errors += 1
+            return False
+        return True
+
+    files = _scan(root)
+    for path, size, mtime in files:
+        last_use = max(mtime, last_referenced.get(path, 0.0))
+        if path in referenced or now - mtime < JANITOR_GRACE:
+            total += size
+        elif max_age and now - last_use > max_age and delete(path):
+            removed.append(path)
+            reclaimed += size
+        else:
+            total += size
+            candidates.append((last_use, size, path))
+
+    if quota and total > quota:
+        candidates.sort()
+        for _last_use, size, path in candidates:
+            if total <= quota:
+                break
+            if delete(path):
+                removed.append(path)
+                reclaimed += size
+                total -= size
+
+    return {
+        "files": len(files) - len(removed),
+        "bytes": total,
+        "removed": removed,
+        "reclaimed": reclaimed,
+        "errors": errors,
+        "scan_ms": round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+class AttachmentJanitor:
+    """Periodically enforce a size quota and maximum age on attachments.
+
+    The message histories of all entries are asked for the files they still
+    use before every run; if one is not available yet the run is skipped
+    rather than risking deleting them.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        quota_mib: int,
+        max_age_days: int,
+        referenced: Callable[[], set[str] | None],
+    ) -> None:
+        """Initialize the janitor."""
+        self._hass = hass
+        self._root = hass.config.path(ATTACHMENTS_DIR)
+        self._quota = quota_mib * 1024 * 1024
+        self._max_age = max_age_days * 24 * 60 * 60
+        self._referenced = referenced
+        self._last_referenced: dict[str, float] = {}
+        self._unsubscribers: list[Callable[[], None]] = []
+        self._running = False
+        self.runs = 0
+        self.deleted = 0
+        self.reclaimed = 0
+        self.last_run: dict[str, Any] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if a quota or maximum age is configured."""
+        return bool(self._quota or self._max_age)
+
+    @callback
+    def async_start(self) -> None:
+        """Schedule the cleanup runs."""
+        if not self.enabled:
+            return
+        self._unsubscribers = [
+            async_call_later(self._hass, JANITOR_STARTUP_DELAY, self._async_run),
+            async_track_time_interval(
+                self._hass,
+                self._async_run,
+                timedelta(seconds=JANITOR_INTERVAL),
+                name="signal_bot attachment janitor",
+            ),
+        ]
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel the scheduled runs."""
+        for unsubscribe in self._unsubscribers:
+            unsubscribe()
+        self._unsubscribers = []
+
+    async def _async_run(self, _now: Any) -> None:
+        """Run one cleanup in an executor."""
+        if self._running:
+            return
+        if (referenced := self._referenced()) is None:
+            if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
+                _LOGGER.debug("Message history not loaded, skipping cleanup")
+            return
+
+        now = time.time()
+        for path in referenced:
+            self._last_referenced[path] = now
+        self._running = True
+        try:
+            result = await self._hass.async_add_executor_job(
+                clean_attachments,
+                self._root,
+                self._quota,
+                self._max_age,
+                referenced,
+                dict(self._last_referenced),
+            )
+        finally:
+            self._running = False
+
+        removed = result.pop("removed")
+        for path in removed:
+            self._last_referenced.pop(path, None)
+        result["deleted"] = len(removed)
+        self.runs += 1
+        self.deleted += len(removed)
+        self.reclaimed += result["reclaimed"]
+        self.last_run = result
+        if removed:
+            _LOGGER.info(
+                "Deleted %s attachments (%s bytes) in %s ms, %s files left",
+                len(removed),
+                result["reclaimed"],
+                result["scan_ms"],
+                result["files"],
+            )
+        elif is_detailed(DEBUG_SUBSYSTEM_SENSOR):
+            _LOGGER.debug(
+                "Scanned %s attachments (%s bytes) in %s ms, nothing to delete",
+                result["files"],
+                result["bytes"],
+                result["scan_ms"],
+            )
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return cleanup counters."""
+        return {
+            "quota_bytes": self._quota,
+            "max_age_days": self._max_age // (24 * 60 * 60),
+            "runs": self.runs,
+            "deleted": self.deleted,
+            "bytes_reclaimed": self.reclaimed,
+            "last_run": dict(self.last_run),
+        }
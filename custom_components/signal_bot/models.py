@@ -0,0 +1,203 @@
+"""Compact in-memory records for Signal messages and groups."""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from .const import (
+    ATTR_GROUP_ID,
+    ATTR_GROUP_NAME,
+    ATTR_MESSAGE_TYPE,
+    MESSAGE_TYPE_INDIVIDUAL,
+    MESSAGE_TYPE_TEXT,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SignalGroup:
+    """Immutable snapshot of a group's details, shared by its messages."""
+
+    group_id: str
+    name: str | None = None
+    members: tuple[str, ...] = ()
+    admins: tuple[str, ...] = ()
+    blocked: bool = False
+    pending_invites: tuple[str, ...] = ()
+    pending_requests: tuple[str, ...] = ()
+    invite_link: str = ""
+
+    @classmethod
+    def from_details(cls, group_id: str, details: dict[str, Any]) -> "SignalGroup":
+        """Create a group from a Signal API group details response."""
+        return cls(
+            group_id=group_id,
+            name=details.get("name"),
+            members=tuple(details.get("members") or ()),
+            admins=tuple(details.get("admins") or ()),
+            blocked=bool(details.get("blocked", False)),
+            pending_invites=tuple(details.get("pending_invites") or ()),
+            pending_requests=tuple(details.get("pending_requests") or ()),
+            invite_link=details.get("invite_link") or "",
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "SignalGroup":
+        """Create a group from the attributes produced by as_dict."""
+        return cls(
+            group_id=data[ATTR_GROUP_ID],
+            name=data.get(ATTR_GROUP_NAME),
+            members=tuple(data.get("group_members") or ()),
+            admins=tuple(data.get("group_admins") or ()),
+            blocked=bool(data.get("group_blocked", False)),
+            pending_invites=tuple(data.get("group_pending_invites") or ()),
+            pending_requests=tuple(data.get("group_pending_requests") or ()),
+            invite_link=data.get("group_invite_link") or "",
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the group as message attributes.
+
+        Member lists are returned as the shared tuples rather than copies.
+        """
+        return {
+            ATTR_GROUP_ID: self.group_id,
+            ATTR_GROUP_NAME: self.name,
+            "group_members": self.members,
+            "group_admins": self.admins,
+            "group_blocked": self.blocked,
+            "group_pending_invites": self.pending_invites,
+            "group_pending_requests": self.pending_requests,
+            "group_invite_link": self.invite_link,
+        }
+
+
+class GroupRegistry:
+    """Intern SignalGroup objects so identical details are stored once."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._groups: dict[str, SignalGroup] = {}
+
+    def __len__(self) -> int:
+        """Return the number of known groups."""
+        return len(self._groups)
+
+    def get(self, group_id: str) -> SignalGroup | None:
+        """Return the current details for a group."""
+        return self._groups.get(group_id)
+
+    def intern(self, group: SignalGroup) -> SignalGroup:
+        """Return the shared instance equal to group, registering it if new.
+
+        Older messages keep referencing the previous instance when a group's
+        details change, so history still shows the group as it was.
+        """
+        current = self._groups.get(group.group_id)
+        if current == group:
+            return current
+        self._groups[group.group_id] = group
+        return group
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return all current groups keyed by group ID."""
+        return {group_id: group.as_dict() for group_id, group in self._groups.items()}
+
+
+@dataclass(slots=True)
+class SignalMessage:
+    """A received message as kept in the sensor history.
+
+    Reactions, edits and remote deletes change a message in place.
+    """
+
+    source: str
+    message: str
+    timestamp: str | None
+    type: str = MESSAGE_TYPE_TEXT
+    message_type: str = MESSAGE_TYPE_INDIVIDUAL
+    attachments: list[dict[str, Any]] = field(default_factory=list)
+    group: SignalGroup | None = None
+    source_name: str | None = None
+    sent_at: int | None = None  # sender's timestamp in ms, identifies the message
+    reactions: dict[str, str] = field(default_factory=dict)  # author: emoji
+    edited: bool = False
+    deleted: bool = False
+
+    def as_dict(self, include_group_details: bool = True) -> dict[str, Any]:
+        """Return the message as a plain dict for state attributes.
+
+        With include_group_details False only the group ID is written, which
+        keeps stored snapshots from repeating the member lists.
+        """
+        data = {
+            "source": self.source,
+            "source_name": self.source_name,
+            "message": self.message,
+            "timestamp": self.timestamp,
+            "sent_at": self.sent_at,
+            "attachments": self.attachments,
+            "type": self.type,
+            ATTR_MESSAGE_TYPE: self.message_type,
+        }
+        if self.reactions:
+            data["reactions"] = self.reactions
+        if self.edited:
+            data["edited"] = True
+        if self.deleted:
+            data["deleted"] = True
+        if self.group is not None:
+            if include_group_details:
+                data.update(self.group.as_dict())
+            else:
+                data[ATTR_GROUP_ID] = self.group.group_id
+        return data
+
+    def react(self, author: str, emoji: str, remove: bool) -> None:
+        """Set or remove an author's reaction.
+
+        The reactions dict is replaced rather than changed, since exported
+        states still refer to the previous one.
+        """
+        reactions = dict(self.reactions)
+        if remove:
+            reactions.pop(author, None)
+        else:
+            reactions[author] = emoji
+        self.reactions = reactions
+
+    def edit(self, message: str) -> None:
+        """Replace the text with an edited version."""
+        self.message = message
+        self.edited = True
+
+    def delete(self) -> None:
+        """Drop the content of a message its sender deleted."""
+        self.message = ""
+        self.attachments = []
+        self.reactions = {}
+        self.deleted = True
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], groups: GroupRegistry) -> "SignalMessage":
+        """Create a message from as_dict output, interning its group."""
+        group = None
+        if group_id := data.get(ATTR_GROUP_ID):
+            if "group_members" in data:
+                group = groups.intern(SignalGroup.from_dict(data))
+            else:
+                group = groups.get(group_id) or groups.intern(
+                    SignalGroup(group_id=group_id)
+                )
+        return cls(
+            source=data.get("source", "unknown"),
+            message=data.get("message", ""),
+            timestamp=data.get("timestamp"),
+            type=data.get("type", MESSAGE_TYPE_TEXT),
+            message_type=data.get(ATTR_MESSAGE_TYPE, MESSAGE_TYPE_INDIVIDUAL),
+            attachments=list(data.get("attachments") or []),
+            group=group,
+            source_name=data.get("source_name"),
+            sent_at=data.get("sent_at"),
+            reactions=dict(data.get("reactions") or {}),
+            edited=data.get("edited", False),
+            deleted=data.get("deleted", False),
+        )
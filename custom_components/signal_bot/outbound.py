@@ -0,0 +1,173 @@
+"""Priority lanes for outbound Signal sends."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import time
+from typing import Any, TypeVar
+
+from .const import (
+    DEBUG_SUBSYSTEM_SEND,
+    LOG_PREFIX_SEND,
+    OUTBOUND_LANES,
+    PRIORITY_BULK,
+    PRIORITY_CRITICAL,
+)
+from .debug import get_logger, is_detailed
+
+_LOGGER = get_logger(__name__, LOG_PREFIX_SEND)
+
+_T = TypeVar("_T")
+
+
+class OutboundLane:
+    """Concurrency and rate limited lane for sends of one priority."""
+
+    def __init__(self, name: str, concurrency: int, rate: float | None) -> None:
+        """Initialize the lane.
+
+        Args:
+            name: Priority served by the lane.
+            concurrency: Maximum sends in flight at once.
+            rate: Maximum sends started per second, or None for no limit.
+
+        """
+        self.name = name
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._interval = 1 / rate if rate else 0.0
+        self._next_start = 0.0
+        self.waiting = 0
+        self.in_flight = 0
+        self.sent = 0
+        self._total_latency = 0.0
+        self._total_wait = 0.0
+        self.last_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+
+    @property
+    def busy(self) -> bool:
+        """Return True while sends are queued or in flight."""
+        return bool(self.waiting or self.in_flight)
+
+    async def _async_rate_limit(self) -> None:
+        """Wait for the next start slot allowed by the rate limit.
+
+        A send cancelled while waiting gives its slot back, unless a later
+        send has already reserved the one after it.
+        """
+        if not self._interval:
+            return
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + self._interval
+        if start > now:
+            try:
+                await asyncio.sleep(start - now)
+            except BaseException:
+                if self._next_start == start + self._interval:
+                    self._next_start = start
+                raise
+
+    async def async_run(
+        self,
+        send: Callable[[], Awaitable[_T]],
+        gate: Callable[[], Awaitable[Any]] | None = None,
+    ) -> _T:
+        """Run a send in this lane.
+
+        Args:
+            send: Factory for the send coroutine.
+            gate: Awaited before a slot is taken; used to hold bulk sends back
+                while critical sends are pending.
+
+        """
+        queued = time.monotonic()
+        self.waiting += 1
+        try:
+            if gate:
+                await gate()
+            await self._semaphore.acquire()
+            try:
+                await self._async_rate_limit()
+                if gate:
+                    await gate()
+            except BaseException:
+                # Cancelled before the send started; free the slot for others
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        started = time.monotonic()
+        self.in_flight += 1
+        try:
+            return await send()
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            finished = time.monotonic()
+            self.sent += 1
+            self._total_wait += started - queued
+            self._total_latency += finished - queued
+            self.last_latency_ms = round((finished - queued) * 1000, 1)
+            self.max_latency_ms = max(self.max_latency_ms, self.last_latency_ms)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return lane counters."""
+        sent = self.sent or 1
+        return {
+            "queue_depth": self.waiting,
+            "in_flight": self.in_flight,
+            "sent": self.sent,
+            "avg_wait_ms": round(self._total_wait / sent * 1000, 1),
+            "avg_latency_ms": round(self._total_latency / sent * 1000, 1),
+            "last_latency_ms": self.last_latency_ms,
+            "max_latency_ms": self.max_latency_ms,
+        }
+
+
+class OutboundDispatcher:
+    """Route sends to per-priority lanes.
+
+    Bulk sends do not start while a critical send is queued or in flight.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the lanes."""
+        self._lanes = {
+            name: OutboundLane(name, concurrency, rate)
+            for name, (concurrency, rate) in OUTBOUND_LANES.items()
+        }
+        self._critical_idle = asyncio.Event()
+        self._critical_idle.set()
+
+    async def _async_wait_for_critical(self) -> None:
+        """Wait until no critical send is pending."""
+        await self._critical_idle.wait()
+
+    async def async_send(self, priority: str, send: Callable[[], Awaitable[_T]]) -> _T:
+        """Run a send in the lane for its priority."""
+        lane = self._lanes[priority]
+        if is_detailed(DEBUG_SUBSYSTEM_SEND):
+            _LOGGER.debug(
+                "Queueing %s send (lane depth %s)",
+                priority,
+                lane.waiting,
+            )
+
+        if priority == PRIORITY_BULK:
+            return await lane.async_run(send, self._async_wait_for_critical)
+        if priority != PRIORITY_CRITICAL:
+            return await lane.async_run(send)
+
+        self._critical_idle.clear()
+        try:
+            return await lane.async_run(send)
+        finally:
+            if not lane.busy:
+                self._critical_idle.set()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return counters for every lane."""
+        return {name: lane.stats for name, lane in self._lanes.items()}
@@ -0,0 +1,83 @@
+"""Retention of raw Signal envelopes for debugging."""
+
+from collections import deque
+from datetime import UTC, datetime
+import json
+from typing import Any
+
+from .const import (
+    RAW_RETENTION_LATEST_DATA,
+    RAW_RETENTION_OFF,
+    RAW_RETENTION_RING,
+    RAW_RING_SIZE,
+)
+
+
+class RawEnvelopeRetention:
+    """Keep a bounded set of raw envelopes in memory according to a policy.
+
+    Policies:
+        off: nothing is kept.
+        latest_data: only the most recent envelope carrying a data message.
+        ring: the last RAW_RING_SIZE envelopes of any kind.
+
+    Envelopes larger than max_bytes once serialized are replaced by a short
+    summary, so a single large payload cannot pin a lot of memory.
+    """
+
+    def __init__(
+        self, policy: str, max_bytes: int, ring_size: int = RAW_RING_SIZE
+    ) -> None:
+        """Initialize the retention buffer."""
+        self.policy = policy
+        self._max_bytes = max_bytes
+        maxlen = ring_size if policy == RAW_RETENTION_RING else 1
+        self._envelopes: deque[dict[str, Any]] = deque(maxlen=maxlen)
+        self.recorded = 0
+        self.truncated = 0
+
+    def wants(self, is_data_message: bool) -> bool:
+        """Return True if an envelope of this kind would be retained."""
+        if self.policy == RAW_RETENTION_OFF:
+            return False
+        if self.policy == RAW_RETENTION_LATEST_DATA:
+            return is_data_message
+        return True
+
+    def record(self, message: dict[str, Any], is_data_message: bool) -> None:
+        """Retain a raw message if the policy asks for it."""
+        if not self.wants(is_data_message):
+            return
+
+        serialized = json.dumps(message, separators=(",", ":"), default=str)
+        size = len(serialized.encode())
+        entry: dict[str, Any] = {
+            "received": datetime.now(UTC).isoformat(),
+            "size": size,
+            "truncated": size > self._max_bytes,
+        }
+        if entry["truncated"]:
+            self.truncated += 1
+            envelope = message.get("envelope", {})
+            entry["envelope_keys"] = sorted(envelope)
+            entry["source"] = envelope.get("source")
+            entry["timestamp"] = envelope.get("timestamp")
+        else:
+            entry["payload"] = message
+
+        self._envelopes.append(entry)
+        self.recorded += 1
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return retained envelopes, oldest first."""
+        return list(self._envelopes)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return retention counters."""
+        return {
+            "policy": self.policy,
+            "retained": len(self._envelopes),
+            "recorded": self.recorded,
+            "truncated": self.truncated,
+        }
@@ -0,0 +1,216 @@
+"""Correlation of delivery and read receipts with sent messages."""
+
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import partial
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DEBUG_SUBSYSTEM_SEND,
+    DELIVERY_DEADLINE,
+    DELIVERY_LATENCY_BUCKETS,
+    DELIVERY_TRACK_MAX,
+    DELIVERY_TRACK_TTL,
+    EVENT_DELIVERY_OVERDUE,
+    LOG_PREFIX_SEND,
+    PRIORITY_CRITICAL,
+)
+from .debug import get_logger, is_detailed
+
+_LOGGER = get_logger(__name__, LOG_PREFIX_SEND)
+
+
+def _empty_histogram() -> dict[str, int]:
+    """Return a latency histogram with all buckets at zero."""
+    histogram = {f"le_{bucket}s": 0 for bucket in DELIVERY_LATENCY_BUCKETS}
+    histogram[f"gt_{DELIVERY_LATENCY_BUCKETS[-1]}s"] = 0
+    return histogram
+
+
+def _bucket(latency: float) -> str:
+    """Return the histogram bucket for a latency in seconds."""
+    for bucket in DELIVERY_LATENCY_BUCKETS:
+        if latency <= bucket:
+            return f"le_{bucket}s"
+    return f"gt_{DELIVERY_LATENCY_BUCKETS[-1]}s"
+
+
+class DeliveryTracker:
+    """Bounded, expiring index from sent message timestamp to recipients.
+
+    Receipts list the Signal timestamps of the messages they acknowledge, so
+    each one is matched with a single dict lookup.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the tracker."""
+        self._hass = hass
+        self._entries: OrderedDict[int, dict[str, Any]] = OrderedDict()
+        self._overdue_timers: dict[int, Callable[[], None]] = {}
+        self.tracked = 0
+        self.delivered = 0
+        self.read = 0
+        self.unmatched = 0
+        self.overdue = 0
+        self.delivery_latency = _empty_histogram()
+        self.read_latency = _empty_histogram()
+
+    @callback
+    def track(
+        self,
+        timestamp: int,
+        recipients: list[str],
+        priority: str,
+        is_group: bool = False,
+    ) -> None:
+        """Start tracking a sent message.
+
+        For group messages the members are not known up front; recipients are
+        added as their receipts arrive.
+        """
+        self._expire()
+        statuses: dict[str, dict[str, float | None]] = {}
+        if not is_group:
+            statuses = {
+                recipient: {"delivered": None, "read": None} for recipient in recipients
+            }
+        self._entries[timestamp] = {
+            "sent": time.monotonic(),
+            "priority": priority,
+            "group": recipients[0] if is_group else None,
+            "recipients": statuses,
+        }
+        self.tracked += 1
+
+        if priority == PRIORITY_CRITICAL:
+            self._overdue_timers[timestamp] = async_call_later(
+                self._hass, DELIVERY_DEADLINE, partial(self._check_overdue, timestamp)
+            )
+
+    def _expire(self) -> None:
+        """Drop entries older than the TTL or beyond the size cap."""
+        cutoff = time.monotonic() - DELIVERY_TRACK_TTL
+        while self._entries:
+            timestamp, entry = next(iter(self._entries.items()))
+            if entry["sent"] >= cutoff and len(self._entries) < DELIVERY_TRACK_MAX:
+                break
+            self._entries.popitem(last=False)
+            if cancel := self._overdue_timers.pop(timestamp, None):
+                cancel()
+
+    def is_tracked(self, timestamps: list[int]) -> bool:
+        """Return True if any of the timestamps is a tracked message."""
+        return any(timestamp in self._entries for timestamp in timestamps)
+
+    @callback
+    def handle_receipt(self, source: str, receipt: dict[str, Any]) -> None:
+        """Record a delivery or read receipt from a recipient."""
+        is_read = bool(receipt.get("isRead") or receipt.get("isViewed"))
+        is_delivery = bool(receipt.get("isDelivery"))
+        if not (is_read or is_delivery):
+            return
+
+        now_ms = time.time() * 1000
+        for timestamp in receipt.get("timestamps") or []:
+            entry = self._entries.get(timestamp)
+            if entry is None:
+                self.unmatched += 1
+                continue
+
+            status = entry["recipients"].setdefault(
+                source, {"delivered": None, "read": None}
+            )
+            latency = max(0.0, (now_ms - timestamp) / 1000)
+            # A read receipt implies delivery even if the delivery receipt was lost.
+            if status["delivered"] is None:
+                status["delivered"] = round(latency, 1)
+                self.delivered += 1
+                self.delivery_latency[_bucket(latency)] += 1
+            if is_read and status["read"] is None:
+                status["read"] = round(latency, 1)
+                self.read += 1
+                self.read_latency[_bucket(latency)] += 1
+
+            if is_detailed(DEBUG_SUBSYSTEM_SEND):
+                _LOGGER.debug(
+                    "Receipt from %s for message %s: %s",
+                    source,
+                    timestamp,
+                    status,
+                )
+
+    @callback
+    def _check_overdue(self, timestamp: int, _now: Any) -> None:
+        """Fire an event if a critical message was not delivered in time."""
+        self._overdue_timers.pop(timestamp, None)
+        if (entry := self._entries.get(timestamp)) is None:
+            return
+
+        recipients = entry["recipients"]
+        if entry["group"]:
+            pending = [] if recipients else [entry["group"]]
+        else:
+            pending = [
+                recipient
+                for recipient, status in recipients.items()
+                if status["delivered"] is None
+            ]
+        if not pending:
+            return
+
+        self.overdue += 1
+        _LOGGER.warning(
+            "Critical message %s not delivered to %s within %s seconds",
+            timestamp,
+            ", ".join(pending),
+            DELIVERY_DEADLINE,
+        )
+        self._hass.bus.async_fire(
+            EVENT_DELIVERY_OVERDUE,
+            {
+                "timestamp": timestamp,
+                "group_id": entry["group"],
+                "pending": pending,
+                "deadline": DELIVERY_DEADLINE,
+            },
+        )
+
+    def status(self, timestamp: int) -> dict[str, Any] | None:
+        """Return the delivery status of a tracked message."""
+        if (entry := self._entries.get(timestamp)) is None:
+            return None
+        return {
+            "timestamp": timestamp,
+            "priority": entry["priority"],
+            "group_id": entry["group"],
+            "age": round(time.monotonic() - entry["sent"], 1),
+            "recipients": {
+                recipient: dict(status)
+                for recipient, status in entry["recipients"].items()
+            },
+        }
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel pending deadline checks."""
+        for cancel in self._overdue_timers.values():
+            cancel()
+        self._overdue_timers.clear()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return tracking counters and latency histograms."""
+        return {
+            "tracking": len(self._entries),
+            "tracked": self.tracked,
+            "delivered": self.delivered,
+            "read": self.read,
+            "unmatched_receipts": self.unmatched,
+            "overdue": self.overdue,
+            "delivery_latency": dict(self.delivery_latency),
+            "read_latency": dict(self.read_latency),
+        }
@@ -0,0 +1,268 @@
+"""Inbound command routing from Signal messages to Home Assistant services."""
+
+from collections.abc import Iterator
+import itertools
+import re
+from typing import Any
+
+from homeassistant.const import CONF_ACTION, CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.service import async_call_from_config
+import voluptuous as vol
+
+from .const import (
+    CONF_EXACT,
+    CONF_GROUPS,
+    CONF_PREFIX,
+    CONF_REGEX,
+    CONF_REPLY,
+    CONF_SENDERS,
+    DEBUG_SUBSYSTEM_SENSOR,
+    DOMAIN,
+    LOG_PREFIX_ROUTER,
+)
+from .debug import get_logger, is_detailed
+from .models import SignalMessage
+
+_LOGGER = get_logger(__name__, LOG_PREFIX_ROUTER)
+
+# Named groups in user patterns are renamed per command in the combined regex
+_NAMED_GROUP = re.compile(r"\(\?P<(\w+)>")
+_NAMED_BACKREF = re.compile(r"\(\?P=(\w+)\)")
+# Group numbers shift in the combined regex, so numbered backrefs cannot work
+_NUMBERED_BACKREF = re.compile(r"(?<!\\)(?:\\\\)*\\(?:[1-9]|g<\d+>)")
+# Global flags must start the pattern, which they cannot inside the alternation
+_GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+_USE_NAMED_GROUPS = "use named groups instead of numbered backreferences"
+_USE_SCOPED_FLAGS = "use scoped flags such as (?i:...) instead of (?i)"
+
+
+class InvalidRegex(vol.Invalid):
+    """Error to indicate a command regex cannot be combined with the others."""
+
+    def __init__(self, reason: str) -> None:
+        """Initialize the error with the reason the regex was rejected."""
+        super().__init__(f"Invalid regular expression: {reason}")
+
+
+def _wrap_regex(pattern: str, index: int) -> str:
+    """Return a command's pattern as its branch of the combined regex."""
+    pattern = _NAMED_GROUP.sub(rf"(?P<c{index}_\1>", pattern)
+    pattern = _NAMED_BACKREF.sub(rf"(?P=c{index}_\1)", pattern)
+    return f"(?P<c{index}>{pattern})"
+
+
+def _valid_regex(value: Any) -> str:
+    """Validate that a value compiles as a branch of the combined regex."""
+    pattern = cv.string(value)
+    if _GLOBAL_FLAGS.search(pattern):
+        raise InvalidRegex(_USE_SCOPED_FLAGS)
+    if _NUMBERED_BACKREF.search(pattern):
+        raise InvalidRegex(_USE_NAMED_GROUPS)
+    try:
+        re.compile(_wrap_regex(pattern, 0))
+    except re.error as err:
+        raise InvalidRegex(str(err)) from err
+    return pattern
+
+
+COMMAND_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(CONF_NAME): cv.string,
+            vol.Exclusive(CONF_EXACT, "match"): cv.string,
+            vol.Exclusive(CONF_PREFIX, "match"): cv.string,
+            vol.Exclusive(CONF_REGEX, "match"): _valid_regex,
+            vol.Optional(CONF_SENDERS, default=[]): vol.All(
+                cv.ensure_list, [cv.string]
+            ),
+            vol.Optional(CONF_GROUPS, default=[]): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(CONF_ACTION): cv.SERVICE_SCHEMA,
+            vol.Optional(CONF_REPLY): cv.template,
+        }
+    ),
+    cv.has_at_least_one_key(CONF_EXACT, CONF_PREFIX, CONF_REGEX),
+    cv.has_at_least_one_key(CONF_ACTION, CONF_REPLY),
+)
+
+
+def _normalize(text: str) -> str:
+    """Normalize message text for exact and prefix matching."""
+    return " ".join(text.split()).casefold()
+
+
+class CommandRouter:
+    """Match messages against declared commands and dispatch them.
+
+    Exact commands are looked up in a dict, prefix commands in a character
+    trie and regex commands in a single combined pattern. Each message is
+    therefore matched once, however many commands are declared. Matching is
+    case-insensitive and collapses whitespace.
+
+    The combined pattern only reports the first regex command that matches. If
+    that command is not allowed for the sender, the later regex commands are
+    tried one by one with their own patterns.
+    """
+
+    def __init__(self, hass: HomeAssistant, commands: list[dict[str, Any]]) -> None:
+        """Compile the declared commands."""
+        self._hass = hass
+        self._commands = commands
+        self._exact: dict[str, list[int]] = {}
+        self._trie: dict[str, Any] = {}
+        self._regexes: list[tuple[int, re.Pattern[str]]] = []
+        regex_parts = []
+
+        for index, command in enumerate(commands):
+            if CONF_EXACT in command:
+                key = _normalize(command[CONF_EXACT])
+                self._exact.setdefault(key, []).append(index)
+            elif CONF_PREFIX in command:
+                node = self._trie
+                for char in _normalize(command[CONF_PREFIX]):
+                    node = node.setdefault(char, {})
+                node.setdefault(None, []).append(index)
+            else:
+                regex_parts.append(_wrap_regex(command[CONF_REGEX], index))
+                self._regexes.append(
+                    (index, re.compile(command[CONF_REGEX], re.IGNORECASE))
+                )
+
+        self._regex = (
+            re.compile("|".join(regex_parts), re.IGNORECASE) if regex_parts else None
+        )
+        self.matched: dict[str, int] = {}
+        self.denied = 0
+        self.failed = 0
+
+    def _prefix_candidates(self, text: str) -> list[tuple[int, int]]:
+        """Return prefix commands matching text, longest prefix first.
+
+        A prefix only matches whole words. Each candidate is returned with the
+        number of words in its prefix.
+        """
+        candidates = []
+        node = self._trie
+        words = 1
+        for char in text:
+            if char == " ":
+                candidates.extend((index, words) for index in node.get(None, []))
+                words += 1
+            if (node := node.get(char)) is None:
+                break
+        else:
+            candidates.extend((index, words) for index in node.get(None, []))
+        return candidates[::-1]
+
+    def _regex_candidates(self, text: str) -> Iterator[tuple[int, str, dict[str, str]]]:
+        """Yield regex commands matching text, in declaration order.
+
+        The first comes from the combined pattern. The others are only matched
+        when the caller asks for them, after the ones before were denied.
+        """
+        if not self._regex or not (match := self._regex.fullmatch(text)):
+            return
+        first = int(match.lastgroup[1:])
+        prefix = f"c{first}_"
+        yield (
+            first,
+            "",
+            {
+                name.removeprefix(prefix): value
+                for name, value in match.groupdict().items()
+                if name.startswith(prefix)
+            },
+        )
+        for index, pattern in self._regexes:
+            if index > first and (match := pattern.fullmatch(text)):
+                yield index, "", match.groupdict()
+
+    def _allowed(self, command: dict[str, Any], message: SignalMessage) -> bool:
+        """Return True if the sender and group may run the command."""
+        if command[CONF_SENDERS] and message.source not in command[CONF_SENDERS]:
+            return False
+        group_id = message.group.group_id if message.group else None
+        return not command[CONF_GROUPS] or group_id in command[CONF_GROUPS]
+
+    def match(
+        self, message: SignalMessage
+    ) -> tuple[dict[str, Any], dict[str, Any]] | None:
+        """Return the first allowed command for a message and its variables."""
+        text = _normalize(message.message)
+        words = message.message.split()
+        candidates: list[tuple[int, str, dict[str, str]]] = [
+            (index, "", {}) for index in self._exact.get(text, [])
+        ]
+        candidates.extend(
+            (index, " ".join(words[prefix_words:]), {})
+            for index, prefix_words in self._prefix_candidates(text)
+        )
+
+        for index, args, groups in itertools.chain(
+            candidates, self._regex_candidates(message.message.strip())
+        ):
+            command = self._commands[index]
+            if not self._allowed(command, message):
+                self.denied += 1
+                if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
+                    _LOGGER.debug(
+                        "%s may not run command %s",
+                        message.source,
+                        command[CONF_NAME],
+                    )
+                continue
+            return command, {
+                "command": command[CONF_NAME],
+                "message": message.message,
+                "args": args,
+                "match": groups,
+                "source": message.source,
+                "source_name": message.source_name,
+                "group_id": message.group.group_id if message.group else None,
+            }
+        return None
+
+    async def async_route(self, message: SignalMessage) -> None:
+        """Dispatch a message to its command's action and send the reply."""
+        if (matched := self.match(message)) is None:
+            return
+        command, variables = matched
+        name = command[CONF_NAME]
+        self.matched[name] = self.matched.get(name, 0) + 1
+        _LOGGER.info("Running command %s for %s", name, message.source)
+
+        try:
+            if CONF_ACTION in command:
+                await async_call_from_config(
+                    self._hass,
+                    command[CONF_ACTION],
+                    blocking=True,
+                    variables=variables,
+                    validate_config=False,
+                )
+            if CONF_REPLY in command:
+                reply = command[CONF_REPLY].async_render(variables, parse_result=False)
+                await self._hass.services.async_call(
+                    DOMAIN,
+                    "send_message",
+                    {
+                        "recipient": variables["group_id"] or message.source,
+                        "message": reply,
+                        "is_group": bool(variables["group_id"]),
+                    },
+                    blocking=True,
+                )
+        except Exception:
+            self.failed += 1
+            _LOGGER.exception("Command %s failed", name)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return routing counters."""
+        return {
+            "commands": len(self._commands),
+            "matched": dict(self.matched),
+            "denied": self.denied,
+            "failed": self.failed,
+        }
@@ -0,0 +1,300 @@
+"""Persisted queue of send_message calls scheduled for later."""
+
+from collections.abc import Awaitable, Callable
+import heapq
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util.ulid import ulid_now
+
+from .const import (
+    DEBUG_SUBSYSTEM_SEND,
+    DOMAIN,
+    HTTP_SERVER_ERROR,
+    HTTP_TOO_MANY_REQUESTS,
+    LOG_PREFIX_SEND,
+    PRIORITY_BULK,
+    PRIORITY_CRITICAL,
+    PRIORITY_NORMAL,
+    SCHEDULE_MAX_PENDING,
+    SCHEDULE_RETRIES,
+    SCHEDULE_RETRY_DELAY,
+    SCHEDULE_SAVE_DELAY,
+    SCHEDULE_SLACK,
+    SCHEDULE_STORAGE_KEY,
+    SCHEDULE_STORAGE_VERSION,
+)
+from .debug import get_logger, is_detailed
+
+_LOGGER = get_logger(__name__, LOG_PREFIX_SEND)
+
+# Sends a validated send_message request and returns its result
+RequestSender = Callable[[dict[str, Any]], Awaitable[dict[str, Any]]]
+
+_ATTACHMENT_FIELDS = ("attachments", "base64_attachments", "attachment_urls")
+
+
+def pop_due_time(request: dict[str, Any]) -> float | None:
+    """Remove send_at or send_after from a request and return its due time.
+
+    Returns a POSIX timestamp, or None if the request should be sent now
+    because it has neither or its time has already passed.
+    """
+    if send_at := request.pop("send_at", None):
+        due = dt_util.as_timestamp(dt_util.as_utc(send_at))
+    elif send_after := request.pop("send_after", None):
+        due = time.time() + send_after.total_seconds()
+    else:
+        return None
+    return due if due > time.time() else None
+
+
+def is_transient(result: dict[str, Any]) -> bool:
+    """Return True if a failed send may succeed when it is retried.
+
+    Timeouts, connection errors, rate limiting and server errors are transient.
+    Results without a status, such as rejected attachments, are not.
+    """
+    if "status" not in result:
+        return False
+    status = result["status"]
+    return (
+        status is None
+        or status == HTTP_TOO_MANY_REQUESTS
+        or status >= HTTP_SERVER_ERROR
+    )
+
+
+def merge_requests(requests: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Merge requests to the same recipient into one digest each.
+
+    Critical requests and requests with attachments are left as they are.
+    A digest keeps the order of its messages and is sent as normal priority
+    if any of them was, else as bulk.
+    """
+    merged: list[dict[str, Any]] = []
+    digests: dict[tuple[str, bool], list[dict[str, Any]]] = {}
+    for request in requests:
+        if request["priority"] == PRIORITY_CRITICAL or any(
+            request.get(name) for name in _ATTACHMENT_FIELDS
+        ):
+            merged.append(request)
+        else:
+            key = (request["recipient"], request["is_group"])
+            digests.setdefault(key, []).append(request)
+
+    for (recipient, is_group), group in digests.items():
+        if len(group) == 1:
+            merged.append(group[0])
+            continue
+        priorities = {request["priority"] for request in group}
+        merged.append(
+            {
+                "recipient": recipient,
+                "is_group": is_group,
+                "message": "\n\n".join(request["message"] for request in group),
+                "priority": (
+                    PRIORITY_NORMAL if PRIORITY_NORMAL in priorities else PRIORITY_BULK
+                ),
+            }
+        )
+    return merged
+
+
+class SendScheduler:
+    """Send requests at a later time from one heap and one timer.
+
+    Pending sends are ordered by due time in a heap, and a single timer is
+    armed for the earliest. The heap is saved to storage, so sends survive
+    restarts; sends that came due while Home Assistant was stopped go out
+    when it starts. A send that fails transiently is queued again, up to
+    SCHEDULE_RETRIES times with a doubling delay.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        send: RequestSender,
+        digest: bool,
+    ) -> None:
+        """Initialize the scheduler."""
+        self._hass = hass
+        self._send = send
+        self._digest = digest
+        self._store: Store[dict[str, Any]] = Store(
+            hass,
+            SCHEDULE_STORAGE_VERSION,
+            SCHEDULE_STORAGE_KEY.format(entry_id=entry_id),
+        )
+        # (due, id, request, retries); ids are unique, so requests never compare
+        self._heap: list[tuple[float, str, dict[str, Any], int]] = []
+        self._cancel_timer: Callable[[], None] | None = None
+        self._timer_due: float | None = None
+        self._started = False
+        self.scheduled = 0
+        self.sent = 0
+        self.merged = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def async_load(self) -> None:
+        """Load the pending sends from storage."""
+        try:
+            data = await self._store.async_load()
+        except Exception:
+            _LOGGER.exception("Failed to load scheduled sends")
+            return
+        for send in (data or {}).get("sends", []):
+            self._heap.append(
+                (send["due"], send["id"], send["request"], send.get("retries", 0))
+            )
+        heapq.heapify(self._heap)
+        if self._heap:
+            _LOGGER.info("Restored %s scheduled sends", len(self._heap))
+
+    @callback
+    def async_start(self) -> None:
+        """Arm the timer, sending any overdue sends right away."""
+        self._started = True
+        self._schedule_timer()
+
+    async def async_shutdown(self) -> None:
+        """Cancel the timer and write the pending sends."""
+        self._started = False
+        if self._cancel_timer:
+            self._cancel_timer()
+            self._cancel_timer = None
+        await self._store.async_save(self._snapshot())
+
+    @callback
+    def schedule(self, request: dict[str, Any], due: float) -> dict[str, Any]:
+        """Queue a request to be sent at due, a POSIX timestamp."""
+        if len(self._heap) >= SCHEDULE_MAX_PENDING:
+            _LOGGER.error(
+                "Cannot schedule message to %s: %s sends already pending",
+                request["recipient"],
+                SCHEDULE_MAX_PENDING,
+            )
+            return {"success": False, "error": "too many scheduled sends"}
+
+        send_id = self._push(request, due)
+        self.scheduled += 1
+        send_at = dt_util.utc_from_timestamp(due).isoformat()
+        if is_detailed(DEBUG_SUBSYSTEM_SEND):
+            _LOGGER.debug("Scheduled message %s to %s", send_id, send_at)
+        return {"success": True, "scheduled": True, "id": send_id, "send_at": send_at}
+
+    @callback
+    def _push(self, request: dict[str, Any], due: float, retries: int = 0) -> str:
+        """Add a send to the heap and return its id."""
+        send_id = ulid_now()
+        heapq.heappush(self._heap, (due, send_id, request, retries))
+        self._store.async_delay_save(self._snapshot, SCHEDULE_SAVE_DELAY)
+        if self._started and (self._timer_due is None or due < self._timer_due):
+            self._schedule_timer()
+        return send_id
+
+    @callback
+    def _schedule_timer(self) -> None:
+        """Arm the timer for the earliest pending send."""
+        if self._cancel_timer:
+            self._cancel_timer()
+            self._cancel_timer = None
+        self._timer_due = None
+        if not self._heap:
+            return
+        self._timer_due = self._heap[0][0]
+        self._cancel_timer = async_call_later(
+            self._hass, max(0.0, self._timer_due - time.time()), self._async_fire
+        )
+
+    @callback
+    def _async_fire(self, _now: Any) -> None:
+        """Send everything that is due and re-arm the timer."""
+        self._cancel_timer = None
+        cutoff = time.time() + SCHEDULE_SLACK
+        due: list[dict[str, Any]] = []
+        retries: list[tuple[dict[str, Any], int]] = []
+        while self._heap and self._heap[0][0] <= cutoff:
+            _, _, request, retry = heapq.heappop(self._heap)
+            if retry:
+                retries.append((request, retry))
+            else:
+                due.append(request)
+
+        if due or retries:
+            # Retried requests were already merged when they first came due
+            requests = merge_requests(due) if self._digest else due
+            self.merged += len(due) - len(requests)
+            if is_detailed(DEBUG_SUBSYSTEM_SEND):
+                _LOGGER.debug(
+                    "Sending %s scheduled messages as %s sends, %s retries",
+                    len(due),
+                    len(requests),
+                    len(retries),
+                )
+            sends = [(request, 0) for request in requests] + retries
+            for request, retry in sends:
+                self._hass.async_create_background_task(
+                    self._async_send(request, retry), f"{DOMAIN} scheduled send"
+                )
+            self._store.async_delay_save(self._snapshot, SCHEDULE_SAVE_DELAY)
+        self._schedule_timer()
+
+    async def _async_send(self, request: dict[str, Any], retries: int) -> None:
+        """Send a due request, queueing it again if it failed transiently."""
+        try:
+            result = await self._send(request)
+        except Exception as err:
+            _LOGGER.exception("Scheduled send to %s failed", request["recipient"])
+            result = {"success": False, "error": str(err)}
+        if result["success"]:
+            self.sent += 1
+            return
+
+        if retries < SCHEDULE_RETRIES and is_transient(result):
+            delay = SCHEDULE_RETRY_DELAY * 2**retries
+            _LOGGER.warning(
+                "Scheduled send to %s failed (%s), retrying in %s s",
+                request["recipient"],
+                result["error"],
+                delay,
+            )
+            self.retried += 1
+            self._push(request, time.time() + delay, retries + 1)
+            return
+        self.failed += 1
+        _LOGGER.error(
+            "Scheduled send to %s failed: %s", request["recipient"], result["error"]
+        )
+
+    def _snapshot(self) -> dict[str, Any]:
+        """Return the pending sends written to storage."""
+        return {
+            "sends": [
+                {"due": due, "id": send_id, "request": request, "retries": retries}
+                for due, send_id, request, retries in self._heap
+            ]
+        }
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return scheduling counters."""
+        return {
+            "pending": len(self._heap),
+            "next_due": (
+                dt_util.utc_from_timestamp(self._heap[0][0]).isoformat()
+                if self._heap
+                else None
+            ),
+            "scheduled": self.scheduled,
+            "sent": self.sent,
+            "merged": self.merged,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
@@ -1,32 +1,60 @@
 """Manages a sensor entity that displays Signal messages in Home Assistant."""
 
-import logging
+import asyncio
+from collections import deque
+from collections.abc import Mapping
+from datetime import timedelta
+import itertools
 from pathlib import Path
+from typing import Any
 
 import aiohttp
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import MATCH_ALL, EntityCategory
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.network import get_url
+from homeassistant.helpers.storage import Store
 
 from .const import (
     API_ENDPOINT_ATTACHMENTS,
     API_ENDPOINT_GROUPS,
     ATTACHMENTS_DIR,
     ATTR_ALL_MESSAGES,
-    ATTR_FULL_MESSAGE,
     ATTR_LATEST_MESSAGE,
-    ATTR_MESSAGE_TYPE,
+    ATTR_MESSAGE_COUNT,
     ATTR_TYPING_STATUS,
     CONF_API_URL,
+    CONF_HISTORY_ATTRIBUTE,
+    CONF_INGEST_WATERMARK,
     CONF_PHONE_NUMBER,
-    DEBUG_DETAILED,
+    DATA_ATTACHMENT_FETCHER,
+    DATA_COMMAND_ROUTER,
+    DATA_CONTACTS,
+    DATA_DELIVERY,
+    DATA_HISTORY,
+    DATA_INGEST,
+    DATA_JANITOR,
+    DATA_OUTBOUND,
+    DATA_RAW_ENVELOPES,
+    DATA_SCHEDULER,
+    DATA_SUPPRESSION,
+    DATA_THUMBNAIL_POOL,
+    DATA_TRANSPORT,
+    DEBUG_SUBSYSTEM_SENSOR,
+    DEFAULT_HISTORY_ATTRIBUTE,
+    DEFAULT_INGEST_WATERMARK,
     DEFAULT_TIMEOUT,
+    DEFAULT_UPDATE_INTERVAL,
+    DISPATCHER_HISTORY_DELTA,
     DOMAIN,
     HTTP_OK,
     LOCAL_PATH_PREFIX,
     LOG_PREFIX_SENSOR,
+    MAX_MESSAGE_HISTORY,
     MESSAGE_TYPE_ATTACHMENT,
     MESSAGE_TYPE_GROUP,
     MESSAGE_TYPE_INDIVIDUAL,
@@ -36,11 +64,38 @@ from .const import (
     SIGNAL_STATE_DISCONNECTED,
     SIGNAL_STATE_ERROR,
     SIGNAL_STATE_UNKNOWN,
+    STATE_WRITE_COOLDOWN,
+    STORAGE_KEY,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+    THUMBNAILS_SUBDIR,
 )
-from .signal_websocket import SignalWebSocket
+from .contacts import ContactDirectory
+from .debug import Payload, get_logger, is_detailed, sample
+from .ingest import IngestPipeline
+from .models import GroupRegistry, SignalGroup, SignalMessage
+from .thumbnails import async_generate_thumbnails
+from .transport import SignalTransport
 from .utils import convert_epoch_to_iso
 
-_LOGGER = logging.getLogger(__name__)
+_LOGGER = get_logger(__name__, LOG_PREFIX_SENSOR)
+
+# Polling interval of the statistics sensor; the message sensor is push-based.
+SCAN_INTERVAL = timedelta(seconds=DEFAULT_UPDATE_INTERVAL)
+
+# Statistics sensor attributes and the runtime data providing them
+STATISTICS_PROVIDERS = {
+    "ingest": DATA_INGEST,
+    "outbound": DATA_OUTBOUND,
+    "delivery": DATA_DELIVERY,
+    "suppression": DATA_SUPPRESSION,
+    "raw_envelopes": DATA_RAW_ENVELOPES,
+    "transport": DATA_TRANSPORT,
+    "attachments": DATA_JANITOR,
+    "contacts": DATA_CONTACTS,
+    "attachment_fetch": DATA_ATTACHMENT_FETCHER,
+    "scheduled": DATA_SCHEDULER,
+}
 
 
 async def download_attachment(
@@ -62,19 +117,19 @@ async def download_attachment(
         ):
             if response.status == HTTP_OK:
                 save_path.write_bytes(await response.read())
-                if DEBUG_DETAILED:
+                if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
                     _LOGGER.debug(
-                        f"{LOG_PREFIX_SENSOR} Downloaded attachment: %s",
+                        "Downloaded attachment: %s",
                         save_path,
                     )
                 return full_url
 
             _LOGGER.error(
-                f"{LOG_PREFIX_SENSOR} Failed to download attachment: HTTP %s",
+                "Failed to download attachment: HTTP %s",
                 response.status,
             )
     except Exception:
-        _LOGGER.exception(f"{LOG_PREFIX_SENSOR} Error downloading attachment")
+        _LOGGER.exception("Error downloading attachment")
     return None
 
 
@@ -84,40 +139,77 @@ async def async_setup_entry(
     async_add_entities,
 ) -> None:
     """Set up Signal Bot sensor."""
-    _LOGGER.debug(f"{LOG_PREFIX_SENSOR} Setting up Signal Bot sensor")
+    _LOGGER.debug("Setting up Signal Bot sensor")
     api_url = entry.data[CONF_API_URL]
     phone_number = entry.data[CONF_PHONE_NUMBER]
 
-    sensor = SignalBotSensor(hass, api_url, phone_number, entry.entry_id)
-    async_add_entities([sensor])
+    sensor = SignalBotSensor(hass, api_url, phone_number, entry.entry_id, entry.options)
+    hass.data[DOMAIN][entry.entry_id][DATA_INGEST] = sensor.ingest
+    hass.data[DOMAIN][entry.entry_id][DATA_TRANSPORT] = sensor.transport
+    hass.data[DOMAIN][entry.entry_id][DATA_CONTACTS] = sensor.contacts
+    hass.data[DOMAIN][entry.entry_id][DATA_HISTORY] = sensor
+    async_add_entities([sensor, SignalBotStatisticsSensor(entry.entry_id)])
 
 
 class SignalBotSensor(SensorEntity):
     """Sensor to display Signal messages and content."""
 
     def __init__(
-        self, hass: HomeAssistant, api_url: str, phone_number: str, entry_id: str
+        self,
+        hass: HomeAssistant,
+        api_url: str,
+        phone_number: str,
+        entry_id: str,
+        options: Mapping[str, Any],
     ) -> None:
         """Initialize the sensor."""
         super().__init__()
         self._attr_unique_id = f"signal_bot_{entry_id}"
         self._attr_name = "Signal Bot Messages"
         self._attr_state = SIGNAL_STATE_UNKNOWN
-        self._messages = []
+        self._messages: deque[SignalMessage] = deque(maxlen=MAX_MESSAGE_HISTORY)
+        self._first_seq = 0  # sequence number of the oldest kept message
+        self._index: dict[tuple[str, int], int] = {}  # (author, sent_at): seq
+        self._exported: list[dict[str, Any]] | None = None  # all_messages cache
+        self._history_loaded = False
+        self._history_attribute = options.get(
+            CONF_HISTORY_ATTRIBUTE, DEFAULT_HISTORY_ATTRIBUTE
+        )
+        self._groups = GroupRegistry()
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry_id)
+        )
         self._api_url = api_url
         self._hass = hass
         self._entry_id = entry_id
         self._available = False
-        self._ws_manager = SignalWebSocket(
+        self.ingest = IngestPipeline(
+            hass,
+            self.async_handle_message,
+            options.get(CONF_INGEST_WATERMARK, DEFAULT_INGEST_WATERMARK),
+            self._is_tracked_receipt,
+        )
+        self._ingest_task: asyncio.Task | None = None
+        self._state_writer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=STATE_WRITE_COOLDOWN,
+            immediate=True,
+            function=self.async_write_ha_state,
+        )
+        self.transport = SignalTransport(
+            hass,
             api_url,
             phone_number,
-            self.async_handle_message,
+            self.ingest.submit,
             self._handle_status,
         )
+        self.contacts = ContactDirectory(hass, api_url, phone_number)
 
         self._attr_extra_state_attributes = {
             ATTR_LATEST_MESSAGE: {
                 "source": None,
+                "source_name": None,
                 "message": "No messages yet",
                 "timestamp": None,
                 "attachments": [],
@@ -132,17 +224,37 @@ class SignalBotSensor(SensorEntity):
                 "group_pending_requests": [],
                 "group_invite_link": "",
             },
-            ATTR_ALL_MESSAGES: [],
             ATTR_TYPING_STATUS: {},
-            ATTR_FULL_MESSAGE: None,
         }
 
-        if DEBUG_DETAILED:
+        if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
             _LOGGER.debug(
-                f"{LOG_PREFIX_SENSOR} Sensor initialized with ID: %s",
+                "Sensor initialized with ID: %s",
                 entry_id,
             )
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return state attributes, converting message records on export.
+
+        The exported history is cached as one list. A new or changed message
+        replaces the list with a copy that reuses the dicts of all other
+        messages, so earlier states are left as they were.
+
+        Without the history attribute only a message count is exported; the
+        history is then read with the signal_bot/history WebSocket command.
+        """
+        attributes = dict(self._attr_extra_state_attributes)
+        if self._messages:
+            attributes[ATTR_LATEST_MESSAGE] = self._messages[-1].as_dict()
+        if self._history_attribute:
+            if self._exported is None:
+                self._exported = [message.as_dict() for message in self._messages]
+            attributes[ATTR_ALL_MESSAGES] = self._exported
+        else:
+            attributes[ATTR_MESSAGE_COUNT] = len(self._messages)
+        return attributes
+
     @property
     def available(self) -> bool:
         """Return if entity is available."""
@@ -156,9 +268,9 @@ class SignalBotSensor(SensorEntity):
     @property
     def state(self) -> str:
         """Return the state of the sensor."""
-        if DEBUG_DETAILED:
+        if sample(DEBUG_SUBSYSTEM_SENSOR, "state"):
             _LOGGER.debug(
-                f"{LOG_PREFIX_SENSOR} Current state: %s",
+                "Current state: %s",
                 self._attr_state,
             )
         return self._attr_state
@@ -177,7 +289,7 @@ class SignalBotSensor(SensorEntity):
 
     async def get_group_details(self, group_id: str) -> dict | None:
         """Fetch group details from Signal API."""
-        url = f"{self._api_url.rstrip('/')}{API_ENDPOINT_GROUPS.format(phone_number=self._ws_manager.phone_number, group_id=group_id)}"
+        url = f"{self._api_url.rstrip('/')}{API_ENDPOINT_GROUPS.format(phone_number=self.transport.phone_number, group_id=group_id)}"
 
         try:
             async with (
@@ -186,16 +298,16 @@ class SignalBotSensor(SensorEntity):
             ):
                 if response.status == HTTP_OK:
                     group_data = await response.json()
-                    if DEBUG_DETAILED:
+                    if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
                         _LOGGER.debug(
-                            f"{LOG_PREFIX_SENSOR} Retrieved group details for %s: %s",
+                            "Retrieved group details for %s: %s",
                             group_id,
-                            group_data,
+                            Payload(group_data),
                         )
                     return group_data
 
                 _LOGGER.error(
-                    f"{LOG_PREFIX_SENSOR} Failed to get group details for %s: HTTP %s",
+                    "Failed to get group details for %s: HTTP %s",
                     group_id,
                     response.status,
                 )
@@ -203,12 +315,12 @@ class SignalBotSensor(SensorEntity):
 
         except TimeoutError:
             _LOGGER.exception(
-                f"{LOG_PREFIX_SENSOR} Timeout while fetching group details for %s",
+                "Timeout while fetching group details for %s",
                 group_id,
             )
         except Exception:
             _LOGGER.exception(
-                f"{LOG_PREFIX_SENSOR} Error fetching group details for %s",
+                "Error fetching group details for %s",
                 group_id,
             )
         return None
@@ -224,10 +336,9 @@ class SignalBotSensor(SensorEntity):
         self._available = mapped_status == SIGNAL_STATE_CONNECTED
         self._attr_state = mapped_status
 
-        if DEBUG_DETAILED:
+        if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
             _LOGGER.debug(
-                f"{LOG_PREFIX_SENSOR} WebSocket status changed to: "
-                f"%s (mapped to: %s)",
+                "WebSocket status changed to: %s (mapped to: %s)",
                 status,
                 mapped_status,
             )
@@ -241,7 +352,7 @@ class SignalBotSensor(SensorEntity):
         if internal_group_id:
             # First get the list of all groups to find the matching one
             groups_url = (
-                f"{self._api_url.rstrip('/')}/v1/groups/{self._ws_manager.phone_number}"
+                f"{self._api_url.rstrip('/')}/v1/groups/{self.transport.phone_number}"
             )
             try:
                 async with (
@@ -261,23 +372,23 @@ class SignalBotSensor(SensorEntity):
                         )
 
                         if matching_group:
-                            if DEBUG_DETAILED:
+                            if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
                                 _LOGGER.debug(
-                                    f"{LOG_PREFIX_SENSOR} Found matching group for internal_id %s: %s",
+                                    "Found matching group for internal_id %s: %s",
                                     internal_group_id,
                                     matching_group,
                                 )
                             return matching_group["id"], matching_group
 
                         _LOGGER.warning(
-                            f"{LOG_PREFIX_SENSOR} No matching group found for internal_id: %s",
+                            "No matching group found for internal_id: %s",
                             internal_group_id,
                         )
                     return None, None
 
             except Exception:
                 _LOGGER.exception(
-                    f"{LOG_PREFIX_SENSOR} Error fetching groups list for internal_id: %s",
+                    "Error fetching groups list for internal_id: %s",
                     internal_group_id,
                 )
                 return None, None
@@ -287,6 +398,9 @@ class SignalBotSensor(SensorEntity):
     async def _process_attachments(self, data_message: dict) -> tuple[list, bool]:
         """Process message attachments."""
         attachments = []
+        thumbnail_pool = self._hass.data[DOMAIN][self._entry_id].get(
+            DATA_THUMBNAIL_POOL
+        )
         if "attachments" in data_message:
             for attachment in data_message["attachments"]:
                 attachment_id = attachment.get("id")
@@ -299,29 +413,35 @@ class SignalBotSensor(SensorEntity):
                         self._hass,
                     )
                     if full_url:
-                        attachments.append(
-                            {
-                                "filename": filename,
-                                "url": full_url,
-                            }
-                        )
+                        attachment_info = {
+                            "filename": filename,
+                            "url": full_url,
+                        }
+                        content_type = attachment.get("contentType") or ""
+                        if thumbnail_pool and content_type.startswith("image/"):
+                            thumbnails = await async_generate_thumbnails(
+                                self._hass, thumbnail_pool, filename
+                            )
+                            if thumbnails:
+                                attachment_info["thumbnails"] = thumbnails
+                        attachments.append(attachment_info)
         return attachments, bool(attachments)
 
     def _handle_typing_message(self, envelope: dict, timestamp: str) -> bool:
         """Handle typing message updates."""
         typing_message = envelope.get("typingMessage")
         if typing_message:
-            self._attr_extra_state_attributes[ATTR_TYPING_STATUS] = {
+            typing_status = {
                 "source": envelope.get("source", "unknown"),
                 "action": typing_message.get("action", "UNKNOWN"),
                 "timestamp": timestamp,
                 "type": MESSAGE_TYPE_TYPING,
             }
-            if DEBUG_DETAILED:
-                _LOGGER.debug(
-                    f"{LOG_PREFIX_SENSOR} Updated typing status without state change"
-                )
-            self.schedule_update_ha_state()
+            self._attr_extra_state_attributes[ATTR_TYPING_STATUS] = typing_status
+            if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
+                _LOGGER.debug("Updated typing status without state change")
+            self._send_delta({"type": "typing", "typing": typing_status})
+            self._state_writer.async_schedule_call()
             return True
         return False
 
@@ -334,97 +454,288 @@ class SignalBotSensor(SensorEntity):
         has_attachments: bool,
         group_id: str | None,
         group_details: dict | None,
-    ) -> dict:
+    ) -> SignalMessage:
         """Create message object with all details."""
         content = data_message.get("message", "").strip()
         source = envelope.get("source", "unknown")
         is_group_message = bool(group_id)
 
-        if DEBUG_DETAILED:
+        if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
             _LOGGER.debug(
-                f"{LOG_PREFIX_SENSOR} Creating message object with group_id: %s, group_details: %s",
+                "Creating message object with group_id: %s, group_details: %s",
                 group_id,
-                group_details,
+                Payload(group_details),
             )
 
-        new_message = {
-            "source": source,
-            "message": content if content else "Attachment received",
-            "timestamp": timestamp,
-            "attachments": attachments,
-            "type": MESSAGE_TYPE_ATTACHMENT if has_attachments else MESSAGE_TYPE_TEXT,
-            ATTR_MESSAGE_TYPE: (
+        new_message = SignalMessage(
+            source=source,
+            message=content if content else "Attachment received",
+            timestamp=timestamp,
+            type=MESSAGE_TYPE_ATTACHMENT if has_attachments else MESSAGE_TYPE_TEXT,
+            message_type=(
                 MESSAGE_TYPE_GROUP if is_group_message else MESSAGE_TYPE_INDIVIDUAL
             ),
-        }
+            attachments=attachments,
+            source_name=self.contacts.resolve(envelope),
+            sent_at=data_message.get("timestamp") or envelope.get("timestamp"),
+        )
 
-        # Add group information if it's a group message
+        # Add group information if it's a group message. Groups are interned,
+        # so every message from the same group shares one member list.
         if is_group_message and group_details:
-            group_info = {
-                "group_id": group_id,
-                "group_name": group_details.get("name"),
-                "group_members": group_details.get("members", []),
-                "group_admins": group_details.get("admins", []),
-                "group_blocked": group_details.get("blocked", False),
-                "group_pending_invites": group_details.get("pending_invites", []),
-                "group_pending_requests": group_details.get("pending_requests", []),
-                "group_invite_link": group_details.get("invite_link", ""),
-            }
-            new_message.update(group_info)
+            new_message.group = self._groups.intern(
+                SignalGroup.from_details(group_id, group_details)
+            )
 
-            if DEBUG_DETAILED:
+            if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
                 _LOGGER.debug(
-                    f"{LOG_PREFIX_SENSOR} Added group details to message: %s",
+                    "Added group details to message: %s",
                     new_message,
                 )
 
         return new_message
 
-    def _update_state(self, new_message: dict, timestamp: str) -> None:
+    def _update_state(self, new_message: SignalMessage, timestamp: str) -> None:
         """Update sensor state with new message."""
-        if DEBUG_DETAILED:
+        if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
             _LOGGER.debug(
-                f"{LOG_PREFIX_SENSOR} Updating state with message: %s",
-                new_message,
+                "Updating state with message: %s",
+                Payload(new_message.as_dict),
             )
 
+        if len(self._messages) == self._messages.maxlen:
+            self._unindex(self._messages[0])
+            self._first_seq += 1
         self._messages.append(new_message)
+        seq = self._first_seq + len(self._messages) - 1
+        self._index_message(new_message, seq)
         self._attr_state = timestamp
-        self._attr_extra_state_attributes[ATTR_LATEST_MESSAGE] = new_message
-        self._attr_extra_state_attributes[ATTR_ALL_MESSAGES] = list(self._messages)
+        exported = new_message.as_dict()
+        if self._exported is not None:
+            self._exported = [*self._exported, exported][-len(self._messages) :]
+        self._send_delta({"type": "message", "seq": seq, "message": exported})
 
-        if DEBUG_DETAILED:
+        if sample(DEBUG_SUBSYSTEM_SENSOR, "attributes"):
             _LOGGER.debug(
-                f"{LOG_PREFIX_SENSOR} Updated state attributes: %s",
-                self._attr_extra_state_attributes,
+                "Updated state attributes: %s",
+                Payload(lambda: self.extra_state_attributes),
             )
-        self.schedule_update_ha_state()
+        self._store.async_delay_save(self._snapshot, STORAGE_SAVE_DELAY)
+        self._state_writer.async_schedule_call()
+
+    def _index_message(self, message: SignalMessage, seq: int) -> None:
+        """Make a message findable by its author and sent timestamp."""
+        if message.sent_at is not None:
+            self._index[message.source, message.sent_at] = seq
+
+    def _unindex(self, message: SignalMessage) -> None:
+        """Forget a message that leaves the history."""
+        if message.sent_at is not None:
+            self._index.pop((message.source, message.sent_at), None)
+
+    def _find_message(
+        self, authors: list[str | None], sent_at: int | None
+    ) -> tuple[int, SignalMessage] | None:
+        """Return the sequence number and message an update refers to.
+
+        Updates name the author by number, UUID or both, so each is tried
+        against the source the message was stored with.
+        """
+        if sent_at is None:
+            return None
+        for author in authors:
+            if author and (seq := self._index.get((author, sent_at))) is not None:
+                return seq, self._messages[seq - self._first_seq]
+        return None
+
+    def _handle_message_change(self, envelope: dict) -> bool:
+        """Apply a reaction, edit or remote delete to the message it targets.
+
+        Returns True if the envelope was one of these, whether or not its
+        target is still in the history; they never become messages of their
+        own.
+        """
+        data_message = envelope.get("dataMessage") or {}
+        source = envelope.get("source", "unknown")
+        senders = [envelope.get("sourceNumber"), envelope.get("sourceUuid"), source]
+
+        if edit := envelope.get("editMessage"):
+            change = "edit"
+            found = self._find_message(senders, edit.get("targetSentTimestamp"))
+            if found:
+                edited = edit.get("dataMessage") or {}
+                found[1].edit((edited.get("message") or "").strip())
+        elif reaction := data_message.get("reaction"):
+            change = "reaction"
+            found = self._find_message(
+                [
+                    reaction.get("targetAuthorNumber"),
+                    reaction.get("targetAuthorUuid"),
+                    reaction.get("targetAuthor"),
+                ],
+                reaction.get("targetSentTimestamp"),
+            )
+            if found:
+                found[1].react(
+                    source, reaction.get("emoji", ""), bool(reaction.get("isRemove"))
+                )
+        elif remote_delete := data_message.get("remoteDelete"):
+            change = "delete"
+            found = self._find_message(senders, remote_delete.get("timestamp"))
+            if found:
+                found[1].delete()
+        else:
+            return False
+
+        if found is None:
+            if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
+                _LOGGER.debug("Ignoring %s of a message not in history", change)
+            return True
+
+        seq, message = found
+        if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
+            _LOGGER.debug("Applied %s to message %s", change, seq)
+        exported = message.as_dict()
+        if self._exported is not None:
+            self._exported = list(self._exported)
+            self._exported[seq - self._first_seq] = exported
+        self._send_delta({"type": "update", "seq": seq, "message": exported})
+        self._store.async_delay_save(self._snapshot, STORAGE_SAVE_DELAY)
+        self._state_writer.async_schedule_call()
+        return True
+
+    def _send_delta(self, delta: dict[str, Any]) -> None:
+        """Push a history change to signal_bot/subscribe subscribers."""
+        async_dispatcher_send(
+            self._hass, DISPATCHER_HISTORY_DELTA, self._entry_id, delta
+        )
+
+    def history_page(self, before: int | None, limit: int) -> dict[str, Any]:
+        """Return up to limit messages older than sequence number before.
+
+        Messages are numbered in arrival order; numbers stay valid while newer
+        messages arrive, so clients can page backwards from any message. Pages
+        are returned oldest first.
+        """
+        end = len(self._messages)
+        if before is not None:
+            end = max(0, min(before - self._first_seq, end))
+        start = max(0, end - limit)
+        messages = [
+            {**message.as_dict(), "seq": self._first_seq + index}
+            for index, message in enumerate(
+                itertools.islice(self._messages, start, end), start
+            )
+        ]
+        return {
+            "messages": messages,
+            "next_before": self._first_seq + start if start else None,
+        }
+
+    def referenced_attachments(self) -> set[str] | None:
+        """Return the attachment files the history uses, or None before restore.
+
+        Paths are relative to the attachments directory, so thumbnails are
+        returned as "thumbnails/<file>".
+        """
+        if not self._history_loaded:
+            return None
+        referenced = set()
+        for message in self._messages:
+            for attachment in message.attachments:
+                if filename := attachment.get("filename"):
+                    referenced.add(filename)
+                referenced.update(
+                    f"{THUMBNAILS_SUBDIR}/{url.rsplit('/', 1)[-1]}"
+                    for url in (attachment.get("thumbnails") or {}).values()
+                )
+        return referenced
+
+    def _snapshot(self) -> dict[str, Any]:
+        """Return the history snapshot written to storage.
+
+        Group details are written once per group and messages refer to them by
+        group ID.
+        """
+        groups = {
+            message.group.group_id: message.group
+            for message in self._messages
+            if message.group is not None
+        }
+        return {
+            "groups": [group.as_dict() for group in groups.values()],
+            "messages": [
+                message.as_dict(include_group_details=False)
+                for message in self._messages
+            ],
+        }
+
+    async def _async_restore_history(self) -> None:
+        """Restore message history from the last stored snapshot."""
+        try:
+            data = await self._store.async_load()
+        except Exception:
+            _LOGGER.exception("Failed to load message history")
+            return
+
+        self._history_loaded = True
+        if not data or not data.get("messages"):
+            return
+
+        for group in data.get("groups", []):
+            self._groups.intern(SignalGroup.from_dict(group))
+        self._messages.extend(
+            SignalMessage.from_dict(message, self._groups)
+            for message in data["messages"]
+        )
+        for seq, message in enumerate(self._messages):
+            self._index_message(message, seq)
+        self._exported = None
+        self._attr_state = self._messages[-1].timestamp or self._attr_state
+        _LOGGER.info(
+            "Restored %s messages from storage",
+            len(self._messages),
+        )
+
+    def _is_tracked_receipt(self, message: dict) -> bool:
+        """Return True for a receipt of a message the delivery tracker awaits."""
+        receipt = message.get("envelope", {}).get("receiptMessage")
+        if not receipt:
+            return False
+        tracker = self._hass.data[DOMAIN][self._entry_id][DATA_DELIVERY]
+        return tracker.is_tracked(receipt.get("timestamps") or [])
 
     async def async_handle_message(self, message: dict) -> None:
         """Handle incoming WebSocket messages."""
-        if DEBUG_DETAILED:
+        if sample(DEBUG_SUBSYSTEM_SENSOR, "message"):
             _LOGGER.debug(
-                f"{LOG_PREFIX_SENSOR} Processing new message, current state: %s",
+                "Processing new message, current state: %s",
                 self._attr_state,
             )
 
         envelope = message.get("envelope", {})
-        self._attr_extra_state_attributes[ATTR_FULL_MESSAGE] = message
+        self._hass.data[DOMAIN][self._entry_id][DATA_RAW_ENVELOPES].record(
+            message, bool(envelope.get("dataMessage") or envelope.get("editMessage"))
+        )
 
-        # Skip processing if it's a receipt message
-        if envelope.get("receiptMessage"):
-            if DEBUG_DETAILED:
-                _LOGGER.debug(f"{LOG_PREFIX_SENSOR} Skipping receipt message")
+        # Receipts only update delivery tracking, not the sensor state
+        if receipt := envelope.get("receiptMessage"):
+            self._hass.data[DOMAIN][self._entry_id][DATA_DELIVERY].handle_receipt(
+                envelope.get("sourceNumber") or envelope.get("source", "unknown"),
+                receipt,
+            )
             return
 
         timestamp = convert_epoch_to_iso(envelope.get("timestamp"))
         if self._handle_typing_message(envelope, timestamp):
             return
+        if self._handle_message_change(envelope):
+            return
 
         data_message = envelope.get("dataMessage")
         if not data_message:
-            if DEBUG_DETAILED:
-                _LOGGER.debug(f"{LOG_PREFIX_SENSOR} Skipping non-data message")
+            if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
+                _LOGGER.debug("Skipping non-data message")
             return
 
         group_info = data_message.get("groupInfo", {})
@@ -445,19 +756,73 @@ class SignalBotSensor(SensorEntity):
 
         self._update_state(new_message, timestamp)
 
+        if router := self._hass.data[DOMAIN].get(DATA_COMMAND_ROUTER):
+            self._hass.async_create_task(router.async_route(new_message))
+
     async def async_added_to_hass(self) -> None:
-        """Start WebSocket connection when added to hass."""
-        _LOGGER.info(f"{LOG_PREFIX_SENSOR} Starting Signal WebSocket connection")
+        """Restore history and start WebSocket connection when added to hass."""
+        await self._async_restore_history()
+        self.contacts.async_start()
+        self._ingest_task = self._hass.async_create_background_task(
+            self.ingest.async_run(), f"{DOMAIN} ingest {self._entry_id}"
+        )
+
+        _LOGGER.info("Starting Signal WebSocket connection")
         try:
-            await self._hass.async_add_executor_job(self._ws_manager.connect)
-            if DEBUG_DETAILED:
-                _LOGGER.debug(f"{LOG_PREFIX_SENSOR} WebSocket connection established")
+            await self.transport.async_start()
+            if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
+                _LOGGER.debug("WebSocket connection established")
         except Exception:
-            _LOGGER.exception(
-                f"{LOG_PREFIX_SENSOR} Failed to establish WebSocket connection"
-            )
+            _LOGGER.exception("Failed to establish WebSocket connection")
 
     async def async_will_remove_from_hass(self) -> None:
         """Stop WebSocket connection when removed from hass."""
-        _LOGGER.info(f"{LOG_PREFIX_SENSOR} Stopping Signal WebSocket connection")
-        await self._hass.async_add_executor_job(self._ws_manager.stop)
+        _LOGGER.info("Stopping Signal WebSocket connection")
+        await self.transport.async_stop()
+        if self._ingest_task:
+            self._ingest_task.cancel()
+        self._state_writer.async_cancel()
+        self.contacts.async_shutdown()
+
+
+class SignalBotStatisticsSensor(SensorEntity):
+    """Diagnostic sensor exposing counters of the integration's pipelines."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = "envelopes"
+    # The counters are for live diagnostics; only the envelope count is recorded
+    _unrecorded_attributes = frozenset({MATCH_ALL})
+
+    def __init__(self, entry_id: str) -> None:
+        """Initialize the sensor."""
+        self._attr_unique_id = f"signal_bot_{entry_id}_statistics"
+        self._attr_name = "Signal Bot Statistics"
+        self._entry_id = entry_id
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return device information."""
+        return DeviceInfo(identifiers={(DOMAIN, self._entry_id)})
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of envelopes received."""
+        return self._runtime_data[DATA_INGEST].received
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the counters of each pipeline."""
+        attributes = {
+            name: self._runtime_data[key].stats
+            for name, key in STATISTICS_PROVIDERS.items()
+            if key in self._runtime_data
+        }
+        if router := self.hass.data[DOMAIN].get(DATA_COMMAND_ROUTER):
+            attributes["commands"] = router.stats
+        return attributes
+
+    @property
+    def _runtime_data(self) -> dict[str, Any]:
+        """Return the runtime data of the config entry."""
+        return self.hass.data[DOMAIN][self._entry_id]
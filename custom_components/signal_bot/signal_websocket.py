@@ -3,16 +3,14 @@
 import asyncio
 from collections.abc import Callable, Coroutine
 import json
-import logging
 import threading
-import time
 from typing import Any
 
 import websocket
 
 from .const import (
     API_ENDPOINT_RECEIVE,
-    DEBUG_DETAILED,
+    DEBUG_SUBSYSTEM_WS,
     DEFAULT_RECONNECT_INTERVAL,
     LOG_PREFIX_WS,
     MAX_RECONNECT_DELAY,
@@ -21,14 +19,16 @@ from .const import (
     SIGNAL_STATE_ERROR,
     WS_TIMEOUT,
 )
+from .debug import Payload, get_logger, is_detailed, sample
 
-_LOGGER = logging.getLogger(__name__)
+_LOGGER = get_logger(__name__, LOG_PREFIX_WS)
 
 MessageCallback = (
     Callable[[dict[str, Any]], Coroutine[Any, Any, None]]
     | Callable[[dict[str, Any]], None]
 )
 StatusCallback = Callable[[str], None]
+UnavailableCallback = Callable[[], None]
 
 
 class SignalWebSocket:
@@ -40,8 +40,14 @@ class SignalWebSocket:
         phone_number: str,
         message_callback: MessageCallback,
         status_callback: StatusCallback | None = None,
+        unavailable_callback: UnavailableCallback | None = None,
     ) -> None:
-        """Initialize the WebSocket manager."""
+        """Initialize the WebSocket manager.
+
+        If unavailable_callback is given, connect() may be limited to a number
+        of consecutive failed attempts, after which the callback is called and
+        the thread exits instead of retrying forever.
+        """
         ws_url = api_url.replace("http://", "ws://").replace("https://", "wss://")
         self._ws_url = (
             f"{ws_url.rstrip('/')}"
@@ -49,6 +55,10 @@ class SignalWebSocket:
         )
         self._message_callback = message_callback
         self._status_callback = status_callback
+        self._unavailable_callback = unavailable_callback
+        self._max_failures = 0
+        self._probe = False
+        self._opened = False
         self._thread: threading.Thread | None = None
         self._stop_event = threading.Event()
         self._ws: websocket.WebSocketApp | None = None
@@ -56,22 +66,29 @@ class SignalWebSocket:
         self._event_loop = asyncio.get_event_loop()
         self.phone_number = phone_number  # Store for use in sensor.py
 
-        if DEBUG_DETAILED:
+        if is_detailed(DEBUG_SUBSYSTEM_WS):
             _LOGGER.debug(
-                f"{LOG_PREFIX_WS} Initialized with URL: %s",
+                "Initialized with URL: %s",
                 self._ws_url,
             )
 
-    def connect(self) -> None:
-        """Start the WebSocket connection."""
+    def connect(self, max_failures: int = 0, probe: bool = False) -> None:
+        """Start the WebSocket connection.
+
+        With max_failures set, give up after that many consecutive attempts
+        that never opened the connection; 0 retries forever. A probe gives up
+        after one failed attempt until the connection has opened once.
+        """
         if self._thread and self._thread.is_alive():
-            _LOGGER.warning(f"{LOG_PREFIX_WS} WebSocket thread is already running.")
+            _LOGGER.warning("WebSocket thread is already running.")
             return
 
         _LOGGER.info(
-            f"{LOG_PREFIX_WS} Connecting to Signal WebSocket: %s",
+            "Connecting to Signal WebSocket: %s",
             self._ws_url,
         )
+        self._max_failures = max_failures
+        self._probe = probe
         self._stop_event.clear()
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
@@ -79,7 +96,10 @@ class SignalWebSocket:
     def _run(self) -> None:
         """WebSocket connection loop with exponential backoff."""
         backoff = self._reconnect_interval
+        failures = 0
+        max_failures = 1 if self._probe else self._max_failures
         while not self._stop_event.is_set():
+            self._opened = False
             try:
                 self._ws = websocket.WebSocketApp(
                     self._ws_url,
@@ -92,31 +112,49 @@ class SignalWebSocket:
                 if self._stop_event.is_set():
                     break
             except websocket.WebSocketException:
-                _LOGGER.exception(f"{LOG_PREFIX_WS} WebSocket error")
+                _LOGGER.exception("WebSocket error")
             except Exception:
-                _LOGGER.exception(
-                    f"{LOG_PREFIX_WS} Unhandled exception in WebSocket connection"
+                _LOGGER.exception("Unhandled exception in WebSocket connection")
+
+            if self._opened:
+                failures = 0
+                backoff = self._reconnect_interval
+                max_failures = self._max_failures
+            else:
+                failures += 1
+            if (
+                max_failures
+                and failures >= max_failures
+                and self._unavailable_callback
+                and not self._stop_event.is_set()
+            ):
+                _LOGGER.warning(
+                    "WebSocket unavailable after %s attempts",
+                    failures,
                 )
+                self._unavailable_callback()
+                break
 
             if not self._stop_event.is_set():
                 _LOGGER.warning(
-                    f"{LOG_PREFIX_WS} Reconnecting in %s seconds...",
+                    "Reconnecting in %s seconds...",
                     backoff,
                 )
-                time.sleep(backoff)
+                self._stop_event.wait(backoff)
                 backoff = min(backoff * 2, MAX_RECONNECT_DELAY)
 
     def _on_open(self, ws: websocket.WebSocketApp) -> None:
         """Handle WebSocket connection open."""
-        _LOGGER.info(f"{LOG_PREFIX_WS} WebSocket connection established")
+        _LOGGER.info("WebSocket connection established")
+        self._opened = True
         if self._status_callback:
             self._status_callback(SIGNAL_STATE_CONNECTED)
 
     def _on_message(self, ws: websocket.WebSocketApp, message: str) -> None:
         """Handle incoming WebSocket messages."""
         try:
-            if DEBUG_DETAILED:
-                _LOGGER.debug(f"{LOG_PREFIX_WS} Raw message received: %s", message)
+            if sample(DEBUG_SUBSYSTEM_WS, "raw"):
+                _LOGGER.debug("Raw message received: %s", Payload(message))
             data = json.loads(message)
 
             # Handle async message callback
@@ -128,22 +166,22 @@ class SignalWebSocket:
                     future.result(timeout=WS_TIMEOUT)
                 except TimeoutError:
                     _LOGGER.exception(
-                        f"{LOG_PREFIX_WS} Async callback timed out after %s seconds",
+                        "Async callback timed out after %s seconds",
                         WS_TIMEOUT,
                     )
                 except Exception:
-                    _LOGGER.exception(f"{LOG_PREFIX_WS} Error in async callback")
+                    _LOGGER.exception("Error in async callback")
             else:
                 self._message_callback(data)
 
         except json.JSONDecodeError:
-            _LOGGER.exception(f"{LOG_PREFIX_WS} Failed to decode message: %s", message)
+            _LOGGER.exception("Failed to decode message: %s", message)
         except Exception:
-            _LOGGER.exception(f"{LOG_PREFIX_WS} Error processing message")
+            _LOGGER.exception("Error processing message")
 
     def _on_error(self, ws: websocket.WebSocketApp, error: Exception) -> None:
         """Handle WebSocket errors."""
-        _LOGGER.error(f"{LOG_PREFIX_WS} WebSocket error: %s", str(error))
+        _LOGGER.error("WebSocket error: %s", str(error))
         if self._status_callback:
             self._status_callback(SIGNAL_STATE_ERROR)
 
@@ -155,7 +193,7 @@ class SignalWebSocket:
     ) -> None:
         """Handle WebSocket disconnections."""
         _LOGGER.warning(
-            f"{LOG_PREFIX_WS} WebSocket connection closed: code=%s, message=%s",
+            "WebSocket connection closed: code=%s, message=%s",
             close_status_code,
             close_msg,
         )
@@ -164,13 +202,13 @@ class SignalWebSocket:
 
     def stop(self) -> None:
         """Stop the WebSocket connection."""
-        _LOGGER.info(f"{LOG_PREFIX_WS} Stopping WebSocket connection")
+        _LOGGER.info("Stopping WebSocket connection")
         self._stop_event.set()
         if self._ws:
             try:
                 self._ws.close()
             except Exception:
-                _LOGGER.exception(f"{LOG_PREFIX_WS} Failed to close WebSocket cleanly")
+                _LOGGER.exception("Failed to close WebSocket cleanly")
         if self._thread:
             self._thread.join()
-            _LOGGER.info(f"{LOG_PREFIX_WS} WebSocket thread stopped")
+            _LOGGER.info("WebSocket thread stopped")
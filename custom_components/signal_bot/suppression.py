@@ -0,0 +1,160 @@
+"""Suppression of repeated outbound messages."""
+
+from collections.abc import Awaitable, Callable
+from functools import partial
+import hashlib
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DEBUG_SUBSYSTEM_SEND,
+    LOG_PREFIX_SEND,
+    SUPPRESSION_DIGEST,
+    SUPPRESSION_MAX_KEYS,
+    SUPPRESSION_OFF,
+)
+from .debug import get_logger, is_detailed
+
+_LOGGER = get_logger(__name__, LOG_PREFIX_SEND)
+
+# Sends a digest: (recipient, is_group, message, priority)
+DigestSender = Callable[[str, bool, str, str], Awaitable[Any]]
+
+
+def message_key(recipient: str, message: str, attachments: list[str]) -> bytes:
+    """Return the suppression key of a message.
+
+    Case and whitespace differences are ignored, so "Door open" and
+    "door  open " count as repeats.
+    """
+    normalized = " ".join(message.split()).casefold()
+    text = "\0".join([recipient, normalized, *attachments])
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def _format_window(seconds: int) -> str:
+    """Return a window length as text for a digest."""
+    if seconds % 60 == 0:
+        return f"{seconds // 60} min"
+    return f"{seconds} s"
+
+
+class OutboundSuppressor:
+    """Drop or digest repeats of a message to the same recipient.
+
+    The first send of a message opens a window. Repeats inside it are not
+    sent; in digest mode a single summary is sent when the window closes if
+    there were any. If the first send fails, its window is discarded so the
+    next repeat is sent.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        mode: str,
+        window: int,
+        send_digest: DigestSender,
+    ) -> None:
+        """Initialize the suppressor."""
+        self._hass = hass
+        self.mode = mode
+        self._window = window
+        self._send_digest = send_digest
+        self._windows: dict[bytes, dict[str, Any]] = {}
+        self._timers: dict[bytes, Callable[[], None]] = {}
+        self.suppressed = 0
+        self.digests = 0
+        self.passed = 0
+        self.discarded = 0
+
+    @callback
+    def check(
+        self,
+        recipient: str,
+        is_group: bool,
+        message: str,
+        priority: str,
+        attachments: list[str],
+    ) -> int:
+        """Return 0 if a message should be sent, else its repeat count."""
+        if self.mode == SUPPRESSION_OFF:
+            return 0
+
+        key = message_key(recipient, message, attachments)
+        if (window := self._windows.get(key)) is not None:
+            window["repeats"] += 1
+            self.suppressed += 1
+            if is_detailed(DEBUG_SUBSYSTEM_SEND):
+                _LOGGER.debug(
+                    "Suppressed repeat %s of message to %s",
+                    window["repeats"],
+                    recipient,
+                )
+            return window["repeats"]
+
+        self.passed += 1
+        if len(self._windows) < SUPPRESSION_MAX_KEYS:
+            self._windows[key] = {
+                "recipient": recipient,
+                "is_group": is_group,
+                "message": message,
+                "priority": priority,
+                "repeats": 0,
+            }
+            self._timers[key] = async_call_later(
+                self._hass, self._window, partial(self._close_window, key)
+            )
+        return 0
+
+    @callback
+    def discard(self, recipient: str, message: str, attachments: list[str]) -> None:
+        """Drop the window of a message whose first send failed, without a digest."""
+        key = message_key(recipient, message, attachments)
+        if cancel := self._timers.pop(key, None):
+            cancel()
+        if self._windows.pop(key, None) is not None:
+            self.discarded += 1
+            if is_detailed(DEBUG_SUBSYSTEM_SEND):
+                _LOGGER.debug("Send to %s failed, not suppressing repeats", recipient)
+
+    @callback
+    def _close_window(self, key: bytes, _now: Any) -> None:
+        """Forget a message and send its digest if it was repeated."""
+        self._timers.pop(key, None)
+        window = self._windows.pop(key)
+        if self.mode != SUPPRESSION_DIGEST or not window["repeats"]:
+            return
+
+        self.digests += 1
+        message = (
+            f"{window['message']}\n"
+            f"(repeated {window['repeats']} times in {_format_window(self._window)})"
+        )
+        self._hass.async_create_task(
+            self._send_digest(
+                window["recipient"], window["is_group"], message, window["priority"]
+            )
+        )
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel open windows without sending their digests."""
+        for cancel in self._timers.values():
+            cancel()
+        self._timers.clear()
+        self._windows.clear()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return suppression counters."""
+        return {
+            "mode": self.mode,
+            "window": self._window,
+            "open_windows": len(self._windows),
+            "passed": self.passed,
+            "suppressed": self.suppressed,
+            "digests_sent": self.digests,
+            "discarded": self.discarded,
+        }
@@ -0,0 +1,103 @@
+"""Thumbnail generation for image attachments in a worker process pool."""
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.network import get_url
+from PIL import Image, ImageOps
+
+from .const import (
+    ATTACHMENTS_DIR,
+    DEBUG_SUBSYSTEM_SENSOR,
+    LOCAL_PATH_PREFIX,
+    LOG_PREFIX_SENSOR,
+    THUMBNAIL_QUALITY,
+    THUMBNAIL_SIZES,
+    THUMBNAIL_WORKERS,
+    THUMBNAILS_SUBDIR,
+)
+from .debug import get_logger, is_detailed
+
+_LOGGER = get_logger(__name__, LOG_PREFIX_SENSOR)
+
+
+def create_thumbnail_pool() -> ProcessPoolExecutor:
+    """Create the process pool used to decode and resize images.
+
+    Workers are spawned rather than forked so they do not inherit the
+    threads and open sockets of the Home Assistant process.
+    """
+    return ProcessPoolExecutor(
+        max_workers=THUMBNAIL_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def render_thumbnails(
+    source: str, target_dir: str, sizes: dict[str, int]
+) -> dict[str, str]:
+    """Render downscaled JPEG copies of an image.
+
+    Runs in a worker process. Sizes are rendered largest first and each one is
+    scaled from the previous result, so the original is decoded only once.
+    Thumbnails are named after the whole source file name, extension included,
+    so photo.png and photo.jpg do not share them.
+
+    Returns:
+        Mapping of size name to the generated file name.
+
+    """
+    target = Path(target_dir)
+    target.mkdir(parents=True, exist_ok=True)
+    source_name = Path(source).name
+    ordered = sorted(sizes.items(), key=lambda item: item[1], reverse=True)
+    rendered = {}
+
+    with Image.open(source) as original:
+        # Let the JPEG decoder skip detail we are about to throw away.
+        original.draft("RGB", (ordered[0][1], ordered[0][1]))
+        image = ImageOps.exif_transpose(original).convert("RGB")
+        for name, size in ordered:
+            image.thumbnail((size, size))
+            filename = f"{source_name}.{name}.jpg"
+            image.save(target / filename, "JPEG", quality=THUMBNAIL_QUALITY)
+            rendered[name] = filename
+
+    return rendered
+
+
+async def async_generate_thumbnails(
+    hass: HomeAssistant, pool: ProcessPoolExecutor, filename: str
+) -> dict[str, str]:
+    """Generate thumbnails for a downloaded attachment and return their URLs."""
+    attachments_dir = Path(hass.config.path(ATTACHMENTS_DIR))
+    source = attachments_dir / filename
+    target_dir = attachments_dir / THUMBNAILS_SUBDIR
+
+    try:
+        rendered = await hass.loop.run_in_executor(
+            pool,
+            render_thumbnails,
+            str(source),
+            str(target_dir),
+            THUMBNAIL_SIZES,
+        )
+    except Exception:
+        _LOGGER.exception("Failed to generate thumbnails for %s", filename)
+        return {}
+
+    instance_url = get_url(hass, prefer_external=True).rstrip("/")
+    thumbnails = {
+        name: f"{instance_url}{LOCAL_PATH_PREFIX}/{THUMBNAILS_SUBDIR}/{thumb}"
+        for name, thumb in rendered.items()
+    }
+
+    if is_detailed(DEBUG_SUBSYSTEM_SENSOR):
+        _LOGGER.debug(
+            "Generated thumbnails for %s: %s",
+            filename,
+            thumbnails,
+        )
+    return thumbnails
@@ -0,0 +1,234 @@
+"""Receive transport with a REST polling fallback for the WebSocket."""
+
+import asyncio
+from collections.abc import Callable
+from contextlib import suppress
+from functools import partial
+from typing import Any
+
+import aiohttp
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    API_ENDPOINT_RECEIVE,
+    DEBUG_SUBSYSTEM_WS,
+    DEFAULT_TIMEOUT,
+    DOMAIN,
+    HTTP_OK,
+    LOG_PREFIX_WS,
+    POLL_BACKOFF_FACTOR,
+    POLL_INTERVAL_MAX,
+    POLL_INTERVAL_MIN,
+    SIGNAL_STATE_CONNECTED,
+    SIGNAL_STATE_ERROR,
+    TRANSPORT_POLLING,
+    TRANSPORT_WEBSOCKET,
+    WS_FALLBACK_FAILURES,
+    WS_REPROBE_INTERVAL,
+)
+from .debug import get_logger, is_detailed
+from .signal_websocket import SignalWebSocket, StatusCallback
+
+_LOGGER = get_logger(__name__, LOG_PREFIX_WS)
+
+
+class SignalTransport:
+    """Receive envelopes over the WebSocket, or by polling when it is unusable.
+
+    The WebSocket is tried first. After WS_FALLBACK_FAILURES attempts that never
+    open, GET /v1/receive/{number} is polled instead: every WS_REPROBE_INTERVAL
+    a single WebSocket attempt is made, and polling stops as soon as it opens.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api_url: str,
+        phone_number: str,
+        message_callback: Callable[[dict[str, Any]], None],
+        status_callback: StatusCallback,
+    ) -> None:
+        """Initialize the transport."""
+        self._hass = hass
+        self._poll_url = (
+            f"{api_url.rstrip('/')}"
+            f"{API_ENDPOINT_RECEIVE.format(phone_number=phone_number)}"
+        )
+        self._message_callback = message_callback
+        self._status_callback = status_callback
+        self._ws = SignalWebSocket(
+            api_url,
+            phone_number,
+            message_callback,
+            self._handle_ws_status,
+            self._handle_ws_unavailable,
+        )
+        self._poll_task: asyncio.Task | None = None
+        self._poll_stop: asyncio.Event | None = None
+        self._cancel_reprobe: Callable[[], None] | None = None
+        self._poll_status: str | None = None
+        self.phone_number = phone_number
+        self.mode = TRANSPORT_WEBSOCKET
+        self.interval = POLL_INTERVAL_MIN
+        self.polls = 0
+        self.polled = 0
+        self.poll_errors = 0
+        self.fallbacks = 0
+        self.reprobes = 0
+
+    async def async_start(self) -> None:
+        """Start receiving over the WebSocket."""
+        await self._hass.async_add_executor_job(self._ws.connect, WS_FALLBACK_FAILURES)
+
+    async def async_stop(self) -> None:
+        """Stop polling and the WebSocket."""
+        self._async_stop_polling()
+        await self._hass.async_add_executor_job(self._ws.stop)
+
+    def _handle_ws_status(self, status: str) -> None:
+        """Forward WebSocket status, switching back from polling on connect.
+
+        Called from the WebSocket thread. While polling, failed probes are not
+        reported, since envelopes are still being received.
+        """
+        if status == SIGNAL_STATE_CONNECTED:
+            self._hass.loop.call_soon_threadsafe(self._async_use_websocket)
+        elif self.mode == TRANSPORT_POLLING:
+            return
+        self._status_callback(status)
+
+    def _handle_ws_unavailable(self) -> None:
+        """Fall back to polling. Called from the WebSocket thread."""
+        self._hass.loop.call_soon_threadsafe(self._async_use_polling)
+
+    @callback
+    def _async_use_websocket(self) -> None:
+        """Stop polling now that the WebSocket is open."""
+        if self.mode == TRANSPORT_WEBSOCKET:
+            return
+        _LOGGER.info("WebSocket available again, stopping polling")
+        self._async_stop_polling(finish_poll=True)
+        self.mode = TRANSPORT_WEBSOCKET
+
+    @callback
+    def _async_use_polling(self) -> None:
+        """Start polling and schedule the next WebSocket probe."""
+        if self.mode == TRANSPORT_POLLING:
+            self._schedule_reprobe()
+            return
+        _LOGGER.warning(
+            "WebSocket unavailable, polling %s instead",
+            self._poll_url,
+        )
+        self.mode = TRANSPORT_POLLING
+        self.fallbacks += 1
+        self.interval = POLL_INTERVAL_MIN
+        self._poll_status = None
+        self._poll_stop = asyncio.Event()
+        self._poll_task = self._hass.async_create_background_task(
+            self._async_poll_loop(self._poll_stop),
+            f"{DOMAIN} poll {self.phone_number}",
+        )
+        self._schedule_reprobe()
+
+    @callback
+    def _async_stop_polling(self, finish_poll: bool = False) -> None:
+        """Stop the poll loop and cancel any pending WebSocket probe.
+
+        The API removes envelopes from its queue once it has returned them, so
+        with finish_poll a poll in progress completes and hands its envelopes
+        on before the loop exits. Otherwise the loop is cancelled.
+        """
+        if self._poll_stop:
+            self._poll_stop.set()
+            self._poll_stop = None
+        if self._poll_task and not finish_poll:
+            self._poll_task.cancel()
+            self._poll_task = None
+        if self._cancel_reprobe:
+            self._cancel_reprobe()
+            self._cancel_reprobe = None
+
+    @callback
+    def _schedule_reprobe(self) -> None:
+        """Schedule a single WebSocket attempt."""
+        self._cancel_reprobe = async_call_later(
+            self._hass, WS_REPROBE_INTERVAL, self._async_reprobe
+        )
+
+    async def _async_reprobe(self, _now: Any) -> None:
+        """Try the WebSocket once; its outcome switches or reschedules."""
+        self._cancel_reprobe = None
+        self.reprobes += 1
+        if is_detailed(DEBUG_SUBSYSTEM_WS):
+            _LOGGER.debug("Probing WebSocket availability")
+        await self._hass.async_add_executor_job(
+            partial(self._ws.connect, WS_FALLBACK_FAILURES, probe=True)
+        )
+
+    async def _async_poll_loop(self, stop: asyncio.Event) -> None:
+        """Poll for envelopes until stop is set, faster while they keep arriving."""
+        session = async_get_clientsession(self._hass)
+        while not stop.is_set():
+            received = await self._async_poll(session)
+            if received:
+                self.interval = POLL_INTERVAL_MIN
+            elif received is None:
+                self.interval = POLL_INTERVAL_MAX
+            else:
+                self.interval = min(
+                    self.interval * POLL_BACKOFF_FACTOR, POLL_INTERVAL_MAX
+                )
+            with suppress(TimeoutError):
+                await asyncio.wait_for(stop.wait(), self.interval)
+
+    async def _async_poll(self, session: aiohttp.ClientSession) -> int | None:
+        """Fetch pending envelopes; return how many, or None on failure."""
+        self.polls += 1
+        try:
+            async with session.get(self._poll_url, timeout=DEFAULT_TIMEOUT) as response:
+                if response.status != HTTP_OK:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info,
+                        response.history,
+                        status=response.status,
+                        message=await response.text(),
+                    )
+                envelopes = await response.json(content_type=None) or []
+        except (aiohttp.ClientError, TimeoutError, ValueError) as err:
+            _LOGGER.warning("Polling failed: %s", err)
+            self.poll_errors += 1
+            self._set_poll_status(SIGNAL_STATE_ERROR)
+            return None
+
+        self._set_poll_status(SIGNAL_STATE_CONNECTED)
+        for envelope in envelopes:
+            self._message_callback(envelope)
+        self.polled += len(envelopes)
+        if envelopes and is_detailed(DEBUG_SUBSYSTEM_WS):
+            _LOGGER.debug("Polled %s envelopes", len(envelopes))
+        return len(envelopes)
+
+    def _set_poll_status(self, status: str) -> None:
+        """Report the polling status when it changes, unless polling stopped."""
+        if self.mode == TRANSPORT_POLLING and status != self._poll_status:
+            self._poll_status = status
+            self._status_callback(status)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the active transport and polling counters."""
+        return {
+            "transport": self.mode,
+            "fallbacks": self.fallbacks,
+            "websocket_probes": self.reprobes,
+            "polls": self.polls,
+            "polled": self.polled,
+            "poll_errors": self.poll_errors,
+            "messages_per_poll": (
+                round(self.polled / self.polls, 2) if self.polls else 0.0
+            ),
+            "poll_interval": round(self.interval, 1),
+        }
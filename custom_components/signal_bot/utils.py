@@ -1,11 +1,11 @@
 """Utility functions for Signal Bot integration."""
 
 from datetime import UTC, datetime
-import logging
 
-from .const import DEBUG_DETAILED, LOG_PREFIX_UTILS
+from .const import DEBUG_SUBSYSTEM_UTILS, LOG_PREFIX_UTILS
+from .debug import get_logger, is_detailed
 
-_LOGGER = logging.getLogger(__name__)
+_LOGGER = get_logger(__name__, LOG_PREFIX_UTILS)
 
 
 def convert_epoch_to_iso(timestamp_ms: int | float | None) -> str | None:
@@ -19,12 +19,12 @@ def convert_epoch_to_iso(timestamp_ms: int | float | None) -> str | None:
 
     """
     if timestamp_ms is None:
-        _LOGGER.warning(f"{LOG_PREFIX_UTILS} Received None timestamp")
+        _LOGGER.warning("Received None timestamp")
         return None
 
     if not isinstance(timestamp_ms, int | float):
         _LOGGER.error(
-            f"{LOG_PREFIX_UTILS} Invalid timestamp type: %s, expected int or float",
+            "Invalid timestamp type: %s, expected int or float",
             type(timestamp_ms),
         )
         return None
@@ -33,21 +33,21 @@ def convert_epoch_to_iso(timestamp_ms: int | float | None) -> str | None:
         timestamp = datetime.fromtimestamp(timestamp_ms / 1000, tz=UTC)
         iso_timestamp = timestamp.isoformat()
 
-        if DEBUG_DETAILED:
+        if is_detailed(DEBUG_SUBSYSTEM_UTILS):
             _LOGGER.debug(
-                f"{LOG_PREFIX_UTILS} Converting timestamp %s to %s",
+                "Converting timestamp %s to %s",
                 timestamp_ms,
                 iso_timestamp,
             )
     except (TypeError, ValueError):
         _LOGGER.exception(
-            f"{LOG_PREFIX_UTILS} Failed to convert timestamp: %s",
+            "Failed to convert timestamp: %s",
             timestamp_ms,
         )
         return None
     except Exception:
         _LOGGER.exception(
-            f"{LOG_PREFIX_UTILS} Unexpected error converting timestamp: %s",
+            "Unexpected error converting timestamp: %s",
             timestamp_ms,
         )
         return None
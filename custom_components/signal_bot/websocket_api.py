@@ -0,0 +1,103 @@
+"""WebSocket API for reading the message history incrementally."""
+
+from typing import Any
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+import voluptuous as vol
+
+from .const import (
+    DATA_HISTORY,
+    DISPATCHER_HISTORY_DELTA,
+    DOMAIN,
+    HISTORY_PAGE_SIZE,
+    MAX_MESSAGE_HISTORY,
+)
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Register the WebSocket commands."""
+    websocket_api.async_register_command(hass, ws_subscribe)
+    websocket_api.async_register_command(hass, ws_history)
+
+
+def _get_history(hass: HomeAssistant, entry_id: str | None) -> Any:
+    """Return the message sensor of an entry, or of the only entry."""
+    sensors = {
+        key: value[DATA_HISTORY]
+        for key, value in hass.data.get(DOMAIN, {}).items()
+        if isinstance(value, dict) and DATA_HISTORY in value
+    }
+    if entry_id is not None:
+        return sensors.get(entry_id)
+    if len(sensors) == 1:
+        return next(iter(sensors.values()))
+    return None
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe",
+        vol.Optional("entry_id"): str,
+    }
+)
+@callback
+def ws_subscribe(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Stream new messages and typing changes as they are received.
+
+    Each event is a delta: {"type": "message", "seq", "message"} for a new
+    message, {"type": "update", "seq", "message"} when a reaction, edit or
+    delete changed one, or {"type": "typing", "typing"}, plus the entry_id it
+    belongs to.
+    """
+    entry_id = msg.get("entry_id")
+
+    @callback
+    def forward_delta(delta_entry_id: str, delta: dict[str, Any]) -> None:
+        """Send a delta to the subscriber."""
+        if entry_id is None or entry_id == delta_entry_id:
+            connection.send_message(
+                websocket_api.event_message(
+                    msg["id"], {"entry_id": delta_entry_id, **delta}
+                )
+            )
+
+    connection.subscriptions[msg["id"]] = async_dispatcher_connect(
+        hass, DISPATCHER_HISTORY_DELTA, forward_delta
+    )
+    connection.send_result(msg["id"])
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/history",
+        vol.Optional("entry_id"): str,
+        vol.Optional("before"): vol.Coerce(int),
+        vol.Optional("limit", default=HISTORY_PAGE_SIZE): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_MESSAGE_HISTORY)
+        ),
+    }
+)
+@callback
+def ws_history(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return a page of the message history, newest page first."""
+    if (sensor := _get_history(hass, msg.get("entry_id"))) is None:
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_NOT_FOUND,
+            "Signal Bot entry not found; pass entry_id when several are set up",
+        )
+        return
+    connection.send_result(
+        msg["id"], sensor.history_page(msg.get("before"), msg["limit"])
+    )
@@ -0,0 +1,630 @@
+"""Soak test for the Signal Bot integration.
+
+Runs Home Assistant with the integration against a fake signal-cli-rest-api on
+the loopback interface and streams synthetic envelopes through it: direct and
+group messages, attachments, commands, typing indicators, receipts and sync
+frames, with periodic WebSocket reconnects. Messages are sent through the
+send_message and broadcast services at the same time.
+
+Memory is sampled with tracemalloc, gc object counts and the process RSS. After
+a warmup the first sample is the baseline; the run fails if traced memory or
+RSS grows by more than the budget by the end.
+
+Requires Home Assistant and the integration requirements:
+
+    pip install homeassistant -r requirements.txt
+    python scripts/soak_test.py --envelopes 1000000 --budget-mb 16
+"""
+
+import argparse
+import asyncio
+from collections import Counter, deque
+from collections.abc import Callable, Iterator
+import gc
+import itertools
+import json
+from pathlib import Path
+import random
+import resource
+import shutil
+import socket
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+
+from aiohttp import WSMsgType, web
+from homeassistant import bootstrap, runner
+from homeassistant.core import HomeAssistant
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DOMAIN = "signal_bot"
+PHONE_NUMBER = "+15550000000"
+CONTACTS = [f"+1555010{index:04d}" for index in range(200)]
+GROUPS = [
+    {
+        "id": f"group.soak{index}",
+        "internal_id": f"soak{index}=",
+        "name": f"Soak group {index}",
+        "members": CONTACTS[index * 10 : index * 10 + 10],
+        "admins": CONTACTS[index * 10 : index * 10 + 1],
+        "blocked": False,
+        "pending_invites": [],
+        "pending_requests": [],
+        "invite_link": "",
+    }
+    for index in range(10)
+]
+ATTACHMENT_NAMES = 50  # attachments reuse this many file names
+ATTACHMENT_BODY = b"soak attachment\n" * 4
+DRAIN_TIMEOUT = 60  # seconds to wait for the integration after the last envelope
+
+# Share of each envelope kind in the stream
+ENVELOPE_MIX = {
+    "direct": 25,
+    "group": 10,
+    "attachment": 2,
+    "command": 1,
+    "typing": 20,
+    "receipt": 35,
+    "sync": 7,
+}
+
+
+def now_ms() -> int:
+    """Return the current time in epoch milliseconds."""
+    return int(time.time() * 1000)
+
+
+class EnvelopeSource:
+    """Deterministic stream of synthetic envelopes.
+
+    Receipts acknowledge messages recently sent through the fake API when
+    there are any, so delivery tracking is exercised as well.
+    """
+
+    def __init__(self, total: int, seed: int) -> None:
+        """Initialize the source."""
+        self.total = total
+        self.sent = 0
+        self.kinds: Counter[str] = Counter()
+        self.sent_timestamps: deque[int] = deque(maxlen=1000)
+        self._random = random.Random(seed)
+        self._kinds = list(ENVELOPE_MIX)
+        self._weights = list(ENVELOPE_MIX.values())
+
+    @property
+    def exhausted(self) -> bool:
+        """Return True once every envelope was produced."""
+        return self.sent >= self.total
+
+    def next(self) -> dict[str, Any]:
+        """Return the next envelope."""
+        kind = self._random.choices(self._kinds, self._weights)[0]
+        self.sent += 1
+        self.kinds[kind] += 1
+        source = self._random.choice(CONTACTS)
+        timestamp = now_ms()
+        envelope: dict[str, Any] = {
+            "source": source,
+            "sourceNumber": source,
+            "sourceName": f"Contact {source[-4:]}",
+            "timestamp": timestamp,
+        }
+
+        if kind == "typing":
+            envelope["typingMessage"] = {
+                "action": self._random.choice(["STARTED", "STOPPED"]),
+                "timestamp": timestamp,
+            }
+        elif kind == "receipt":
+            if self.sent_timestamps:
+                acknowledged = self._random.choice(self.sent_timestamps)
+            else:
+                acknowledged = timestamp - 1000
+            envelope["receiptMessage"] = {
+                "when": timestamp,
+                "isDelivery": True,
+                "isRead": self._random.random() < 0.5,
+                "timestamps": [acknowledged],
+            }
+        elif kind == "sync":
+            envelope["syncMessage"] = {}
+        else:
+            envelope["dataMessage"] = self._data_message(kind, timestamp)
+        return {"envelope": envelope, "account": PHONE_NUMBER}
+
+    def _data_message(self, kind: str, timestamp: int) -> dict[str, Any]:
+        """Return the dataMessage of a data envelope."""
+        data: dict[str, Any] = {
+            "timestamp": timestamp,
+            "message": f"Soak message {self.sent}",
+        }
+        if kind == "group":
+            group = self._random.choice(GROUPS)
+            data["groupInfo"] = {"groupId": group["internal_id"], "type": "DELIVER"}
+        elif kind == "attachment":
+            name = f"soak_{self.sent % ATTACHMENT_NAMES}.txt"
+            data["message"] = ""
+            data["attachments"] = [
+                {
+                    "id": name,
+                    "contentType": "text/plain",
+                    "filename": name,
+                    "size": len(ATTACHMENT_BODY),
+                }
+            ]
+        elif kind == "command":
+            data["message"] = "!soak status"
+        return data
+
+
+class FakeSignalApi:
+    """Minimal signal-cli-rest-api serving an EnvelopeSource."""
+
+    def __init__(
+        self,
+        source: EnvelopeSource,
+        rate: float,
+        reconnect_every: int,
+        backlog: Callable[[], int],
+        max_backlog: int,
+    ) -> None:
+        """Initialize the fake API.
+
+        Args:
+            source: Envelopes to stream.
+            rate: Envelopes per second, or 0 for as fast as they are consumed.
+            reconnect_every: Close the WebSocket after this many envelopes.
+            backlog: Returns how many envelopes the integration has not handled.
+            max_backlog: Pause streaming while the backlog is above this.
+
+        """
+        self.source = source
+        self._rate = rate
+        self._reconnect_every = reconnect_every
+        self._backlog = backlog
+        self._max_backlog = max_backlog
+        self.connections = 0
+        self.sends = 0
+        self.requests: Counter[str] = Counter()
+        self._runner: web.AppRunner | None = None
+        self.port = 0
+
+    async def async_start(self) -> None:
+        """Start serving on a free loopback port."""
+        app = web.Application()
+        app.router.add_get("/v1/health", self._health)
+        app.router.add_get("/v1/receive/{number}", self._receive)
+        app.router.add_get("/v1/contacts/{number}", self._contacts)
+        app.router.add_get("/v1/groups/{number}", self._groups)
+        app.router.add_get("/v1/groups/{number}/{group_id}", self._group)
+        app.router.add_get("/v1/attachments/{attachment_id}", self._attachment)
+        app.router.add_post("/v1/send", self._send)
+        app.router.add_post("/v2/send", self._send)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+
+    async def async_stop(self) -> None:
+        """Stop serving."""
+        if self._runner:
+            await self._runner.cleanup()
+
+    @property
+    def url(self) -> str:
+        """Return the base URL of the API."""
+        return f"http://127.0.0.1:{self.port}"
+
+    async def _health(self, request: web.Request) -> web.Response:
+        """Answer the health check."""
+        self.requests["health"] += 1
+        return web.Response(status=204)
+
+    async def _receive(self, request: web.Request) -> web.StreamResponse:
+        """Stream envelopes over a WebSocket, or return a batch when polled."""
+        self.requests["receive"] += 1
+        ws = web.WebSocketResponse()
+        if not ws.can_prepare(request).ok:
+            batch = []
+            while len(batch) < 100 and not self.source.exhausted:
+                batch.append(self.source.next())
+            return web.json_response(batch)
+
+        await ws.prepare(request)
+        self.connections += 1
+        if not await self._async_stream(request, ws):
+            return ws
+
+        if self.source.exhausted and not ws.closed:
+            # Keep the connection open like the real API, until closed.
+            async for msg in ws:
+                if msg.type in (WSMsgType.CLOSE, WSMsgType.ERROR):
+                    break
+        await ws.close()
+        return ws
+
+    async def _async_stream(
+        self, request: web.Request, ws: web.WebSocketResponse
+    ) -> bool:
+        """Stream envelopes; return False if the integration disconnected."""
+        started = time.monotonic()
+        streamed = 0
+        try:
+            while not self.source.exhausted and not ws.closed:
+                while self._backlog() > self._max_backlog:
+                    await asyncio.sleep(0.01)
+                if request.transport is None or request.transport.is_closing():
+                    return False
+                await ws.send_str(json.dumps(self.source.next()))
+                streamed += 1
+                if self._reconnect_every and streamed >= self._reconnect_every:
+                    break
+                if self._rate:
+                    delay = started + streamed / self._rate - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif streamed % 100 == 0:
+                    await asyncio.sleep(0)
+        except ConnectionResetError:
+            # The integration closed the connection, e.g. on reload.
+            return False
+        return True
+
+    async def _contacts(self, request: web.Request) -> web.Response:
+        """Return all contacts."""
+        self.requests["contacts"] += 1
+        return web.json_response(
+            [
+                {"number": number, "name": f"Contact {number[-4:]}"}
+                for number in CONTACTS
+            ]
+        )
+
+    async def _groups(self, request: web.Request) -> web.Response:
+        """Return all groups."""
+        self.requests["groups"] += 1
+        return web.json_response(GROUPS)
+
+    async def _group(self, request: web.Request) -> web.Response:
+        """Return a single group."""
+        self.requests["group"] += 1
+        group_id = request.match_info["group_id"]
+        for group in GROUPS:
+            if group["id"] == group_id:
+                return web.json_response(group)
+        return web.Response(status=404)
+
+    async def _attachment(self, request: web.Request) -> web.Response:
+        """Return attachment content."""
+        self.requests["attachment"] += 1
+        return web.Response(body=ATTACHMENT_BODY, content_type="text/plain")
+
+    async def _send(self, request: web.Request) -> web.Response:
+        """Accept a send and queue a receipt for it."""
+        self.requests["send"] += 1
+        await request.read()
+        self.sends += 1
+        timestamp = now_ms()
+        self.source.sent_timestamps.append(timestamp)
+        return web.json_response({"timestamp": str(timestamp)}, status=201)
+
+
+def rss_bytes() -> int:
+    """Return the resident set size of this process."""
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    # Peak RSS: kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def object_counts() -> Counter[str]:
+    """Return the number of gc-tracked objects per type."""
+    return Counter(type(obj).__qualname__ for obj in gc.get_objects())
+
+
+class MemorySample:
+    """Memory state at one point of the run."""
+
+    def __init__(self, envelopes: int) -> None:
+        """Collect garbage and take the sample."""
+        gc.collect()
+        self.time = time.monotonic()
+        self.envelopes = envelopes
+        self.snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        self.traced = tracemalloc.get_traced_memory()[0]
+        self.rss = rss_bytes()
+        self.objects = object_counts()
+
+
+def mib(size: float) -> str:
+    """Return a byte count in MiB."""
+    return f"{size / 1024 / 1024:.1f} MiB"
+
+
+def report_growth(baseline: MemorySample, sample: MemorySample, top: int) -> None:
+    """Print the allocation sites and object types that grew the most."""
+    print(f"  top {top} allocation sites by growth:")
+    for stat in sample.snapshot.compare_to(baseline.snapshot, "lineno")[:top]:
+        frame = stat.traceback[0]
+        print(
+            f"    {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  "
+            f"{frame.filename}:{frame.lineno}"
+        )
+    print(f"  top {top} object types by growth:")
+    growth = sample.objects.copy()
+    growth.subtract(baseline.objects)
+    for name, count in growth.most_common(top):
+        if count > 0:
+            print(f"    {count:+10d}  {name}")
+
+
+async def async_setup_hass(config_dir: Path, api: FakeSignalApi) -> HomeAssistant:
+    """Start Home Assistant with the integration pointed at the fake API."""
+    (config_dir / "custom_components").mkdir(parents=True)
+    (config_dir / "custom_components" / DOMAIN).symlink_to(
+        REPO_ROOT / "custom_components" / DOMAIN
+    )
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        http_port = sock.getsockname()[1]
+    (config_dir / "configuration.yaml").write_text(
+        f"""
+homeassistant:
+  external_url: "http://127.0.0.1:{http_port}"
+http:
+  server_host: 127.0.0.1
+  server_port: {http_port}
+logger:
+  default: warning
+{DOMAIN}:
+  commands:
+    - name: soak
+      prefix: "!soak"
+      reply: "ok {{{{ args }}}}"
+"""
+    )
+
+    hass = await bootstrap.async_setup_hass(
+        runner.RuntimeConfig(config_dir=str(config_dir), skip_pip=True)
+    )
+    if hass is None:
+        sys.exit("Home Assistant failed to start")
+    await hass.async_start()
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": "user"},
+        data={"api_url": api.url, "phone_number": PHONE_NUMBER},
+    )
+    if result["type"] != "create_entry":
+        sys.exit(f"Config flow failed: {result}")
+    entry = result["result"]
+    hass.config_entries.async_update_entry(
+        entry,
+        options={
+            "raw_retention": "ring",
+            "suppression": "digest",
+            "suppression_window": 60,
+        },
+    )
+    await hass.async_block_till_done()
+    return hass
+
+
+def runtime_data(hass: HomeAssistant) -> dict[str, Any]:
+    """Return the runtime data of the only config entry."""
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+    return hass.data[DOMAIN][entry.entry_id]
+
+
+async def async_send_loop(hass: HomeAssistant, rate: float) -> None:
+    """Call send_message and, every tenth time, broadcast."""
+    recipients: Iterator[str] = itertools.cycle(CONTACTS)
+    for count in itertools.count():
+        if count % 10 == 9:
+            await hass.services.async_call(
+                DOMAIN,
+                "broadcast",
+                {
+                    "recipients": [next(recipients) for _ in range(25)],
+                    "groups": [GROUPS[count % len(GROUPS)]["id"]],
+                    "message": f"Soak broadcast {count}",
+                    "priority": "bulk",
+                },
+                blocking=True,
+            )
+        else:
+            await hass.services.async_call(
+                DOMAIN,
+                "send_message",
+                {
+                    "recipient": next(recipients),
+                    "message": f"Soak alert {count % 20}",
+                    "priority": "critical" if count % 50 == 0 else "normal",
+                },
+                blocking=True,
+            )
+        await asyncio.sleep(1 / rate)
+
+
+class SoakRun:
+    """Stream the envelopes and sample memory until the integration caught up."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        """Initialize the run."""
+        self.args = args
+        self.source = EnvelopeSource(args.envelopes, args.seed)
+        self.api = FakeSignalApi(
+            self.source,
+            args.rate,
+            args.reconnect_every,
+            self.backlog,
+            args.max_backlog,
+        )
+        self.ingest: Any = None
+        self.baseline: MemorySample | None = None
+        self.started = time.monotonic()
+
+    def backlog(self) -> int:
+        """Return envelopes streamed but not yet handled by the sensor.
+
+        Streaming waits until setup, including the options reload, is done.
+        """
+        if self.ingest is None:
+            return sys.maxsize
+        ingest = self.ingest
+        handled = ingest.processed + ingest.collapsed + sum(ingest.shed.values())
+        return self.source.sent - handled
+
+    async def async_monitor(self) -> None:
+        """Sample memory until every envelope was streamed and handled."""
+        args = self.args
+        next_sample = time.monotonic() + args.interval
+        drain_deadline: float | None = None
+        while True:
+            await asyncio.sleep(1)
+            if self.source.exhausted:
+                drain_deadline = drain_deadline or time.monotonic() + DRAIN_TIMEOUT
+                if self.backlog() <= 0 or time.monotonic() > drain_deadline:
+                    return
+
+            if self.baseline is None:
+                if self.ingest.processed >= args.warmup:
+                    self.baseline = MemorySample(self.source.sent)
+                    print(
+                        f"baseline after {self.source.sent} envelopes: traced "
+                        f"{mib(self.baseline.traced)}, RSS {mib(self.baseline.rss)}"
+                    )
+            elif time.monotonic() >= next_sample:
+                next_sample = time.monotonic() + args.interval
+                self.report(MemorySample(self.source.sent))
+
+    def report(self, sample: MemorySample) -> None:
+        """Print a progress line and the growth since the baseline."""
+        assert self.baseline is not None
+        elapsed = sample.time - self.started
+        print(
+            f"[{elapsed:7.0f}s] {sample.envelopes} envelopes "
+            f"({sample.envelopes / elapsed:.0f}/s), {self.api.sends} sends, "
+            f"{self.api.connections} connections: traced {mib(sample.traced)} "
+            f"({mib(sample.traced - self.baseline.traced)} growth), "
+            f"RSS {mib(sample.rss)}"
+        )
+        report_growth(self.baseline, sample, self.args.top)
+
+    async def async_run(self) -> bool:
+        """Run the soak test and return True if memory stayed within budget."""
+        args = self.args
+        tracemalloc.start(args.frames)
+        config_dir = Path(tempfile.mkdtemp(prefix="signal_bot_soak_"))
+        await self.api.async_start()
+        hass = await async_setup_hass(config_dir, self.api)
+        self.ingest = runtime_data(hass)["ingest"]
+        sender = asyncio.create_task(async_send_loop(hass, args.send_rate))
+        try:
+            await self.async_monitor()
+        finally:
+            sender.cancel()
+            final = MemorySample(self.source.sent)
+            stats = {
+                name: provider.stats
+                for name, provider in runtime_data(hass).items()
+                if hasattr(provider, "stats")
+            }
+            await hass.async_stop()
+            await self.api.async_stop()
+            if not args.keep_config:
+                shutil.rmtree(config_dir, ignore_errors=True)
+
+        print(f"envelopes by kind: {dict(self.source.kinds)}")
+        print(f"fake API requests: {dict(self.api.requests)}")
+        print(f"integration statistics: {json.dumps(stats, default=str)}")
+        return self.check_budget(final)
+
+    def check_budget(self, final: MemorySample) -> bool:
+        """Report the growth since the baseline and compare it to the budget."""
+        args = self.args
+        if self.baseline is None:
+            print("FAIL: the warmup never completed")
+            return False
+
+        traced_growth = final.traced - self.baseline.traced
+        rss_growth = final.rss - self.baseline.rss
+        print(
+            f"final after {final.envelopes - self.baseline.envelopes} envelopes "
+            f"past the baseline: traced growth {mib(traced_growth)} (budget "
+            f"{args.budget_mb} MiB), RSS growth {mib(rss_growth)} (budget "
+            f"{args.rss_budget_mb} MiB)"
+        )
+        report_growth(self.baseline, final, args.top)
+        passed = (
+            traced_growth <= args.budget_mb * 1024 * 1024
+            and rss_growth <= args.rss_budget_mb * 1024 * 1024
+        )
+        print("PASS" if passed else "FAIL: memory grew beyond the budget")
+        return passed
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--envelopes", type=int, default=1_000_000)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="envelopes per second, 0 = unpaced"
+    )
+    parser.add_argument(
+        "--send-rate", type=float, default=20, help="service calls per second"
+    )
+    parser.add_argument(
+        "--reconnect-every",
+        type=int,
+        default=100_000,
+        help="close the WebSocket after this many envelopes",
+    )
+    parser.add_argument(
+        "--max-backlog",
+        type=int,
+        default=500,
+        help="pause streaming while this many envelopes are unhandled",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=20_000,
+        help="envelopes handled before the baseline sample",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=60, help="seconds between samples"
+    )
+    parser.add_argument(
+        "--budget-mb", type=float, default=16, help="allowed traced memory growth"
+    )
+    parser.add_argument(
+        "--rss-budget-mb", type=float, default=64, help="allowed RSS growth"
+    )
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--frames", type=int, default=1, help="tracemalloc depth")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-config", action="store_true")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Run the soak test."""
+    args = parse_args()
+    return 0 if asyncio.run(SoakRun(args).async_run()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
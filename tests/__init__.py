@@ -0,0 +1 @@
+"""Tests for the Signal Bot integration."""
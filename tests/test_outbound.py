@@ -0,0 +1,41 @@
+"""Tests for the outbound priority lanes."""
+
+import asyncio
+
+import pytest
+
+from custom_components.signal_bot.const import PRIORITY_BULK
+from custom_components.signal_bot.outbound import OutboundDispatcher
+
+
+async def _async_send(sent: list[int], number: int) -> int:
+    """Record a send and return its number."""
+    sent.append(number)
+    return number
+
+
+def test_cancelled_bulk_send_frees_the_lane() -> None:
+    """A bulk send cancelled while rate limited must not block the next one."""
+
+    async def run() -> None:
+        dispatcher = OutboundDispatcher()
+        sent: list[int] = []
+        await dispatcher.async_send(PRIORITY_BULK, lambda: _async_send(sent, 1))
+
+        # The first send took the start slot, so this one waits for the next
+        waiting = asyncio.create_task(
+            dispatcher.async_send(PRIORITY_BULK, lambda: _async_send(sent, 2))
+        )
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        result = await asyncio.wait_for(
+            dispatcher.async_send(PRIORITY_BULK, lambda: _async_send(sent, 3)), 5
+        )
+        assert result == 3
+        assert sent == [1, 3]
+        assert dispatcher.stats[PRIORITY_BULK]["queue_depth"] == 0
+
+    asyncio.run(run())